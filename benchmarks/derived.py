@@ -0,0 +1,41 @@
+"""
+Time to compute every derived variable (see weatherbit.derived) over a large
+daily History, and to look them up once cached.
+
+    python benchmarks/derived.py [points]
+"""
+import sys
+import timeit
+import datetime
+
+from weatherbit.derived import DERIVED_VARIABLES
+from weatherbit.models import History
+from weatherbit.transport import generate_payload
+
+
+def main(points=5000):
+    end = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=points)
+    payload = generate_payload('history/daily', {'lat': '35.5', 'lon': '-78.5', 'start_date': '2000-01-01',
+                                                 'end_date': end.strftime('%Y-%m-%d')})
+    history = History(payload, None, {}, lean=True)
+    print('{} points'.format(len(history.points)))
+
+    def compute():
+        history.__dict__.pop('_derived', None)
+        for name in DERIVED_VARIABLES:
+            history.derive(name)
+
+    def cached():
+        for name in DERIVED_VARIABLES:
+            history.derive(name)
+
+    for label, function in [('computed', compute), ('cached', cached)]:
+        runs = timeit.repeat(function, number=5, repeat=3)
+        print('{:>10}: {:.2f} ms for {} variables'.format(label, min(runs) / 5 * 1000, len(DERIVED_VARIABLES)))
+    for name in sorted(DERIVED_VARIABLES):
+        runs = timeit.repeat(lambda: DERIVED_VARIABLES[name](history), number=5, repeat=3)
+        print('{:>10}: {:.2f} ms'.format(name, min(runs) / 5 * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
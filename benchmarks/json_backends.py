@@ -0,0 +1,51 @@
+"""
+Decoding time of a large history payload with each installed JSON backend
+(see weatherbit.utils.get_json_loads).
+
+    python benchmarks/json_backends.py [points]
+"""
+import sys
+import json
+import random
+import timeit
+import datetime
+
+from weatherbit.utils import JSON_BACKENDS, get_json_loads
+
+
+def history_payload(points):
+    """
+    An hourly history payload of points points, with random values.
+    """
+    rng = random.Random(0)
+    start = datetime.datetime(2020, 1, 1)
+    data = []
+    for i in range(points):
+        t = start + datetime.timedelta(hours=i)
+        temp = round(rng.uniform(-5, 32), 1)
+        data.append({'temp': temp, 'app_temp': temp, 'rh': rng.randint(20, 100), 'dewpt': round(temp - rng.uniform(0, 10), 1),
+                     'wind_spd': round(rng.uniform(0, 12), 1), 'wind_dir': rng.randint(0, 359), 'precip': rng.choice([0, 0, 0.5]),
+                     'pres': 1012.3, 'slp': 1015.1, 'clouds': rng.randint(0, 100), 'vis': 10, 'uv': round(rng.uniform(0, 9), 1),
+                     'weather': {'icon': 'c02d', 'code': 802, 'description': 'Scattered clouds'},
+                     'datetime': t.strftime('%Y-%m-%d:%H'), 'timestamp_utc': t.strftime('%Y-%m-%dT%H:%M:%S'),
+                     'timestamp_local': (t - datetime.timedelta(hours=5)).strftime('%Y-%m-%dT%H:%M:%S')})
+    return {'city_name': 'Raleigh', 'lat': 35.5, 'lon': -78.5, 'timezone': 'America/New_York', 'data': data}
+
+
+def main(points=8760):
+    payload = history_payload(points)
+    content = json.dumps(payload).encode('utf-8')
+    print('{} points, {:.2f} MB'.format(len(payload['data']), len(content) / 1e6))
+
+    for backend in JSON_BACKENDS:
+        try:
+            loads = get_json_loads(backend)
+        except ImportError:
+            print('{:>10}: not installed'.format(backend))
+            continue
+        runs = timeit.repeat(lambda: loads(content), number=5, repeat=3)
+        print('{:>10}: {:.1f} ms per decode'.format(backend, min(runs) / 5 * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+"""
+Size, and encode/decode times of a large History with to_bytes(), compared
+with pickle, in full and lean mode (see weatherbit.serialization).
+
+    python benchmarks/serialization.py [points]
+"""
+import sys
+import json
+import pickle
+import timeit
+import datetime
+
+from weatherbit.models import History
+from weatherbit.transport import generate_payload
+
+
+def main(points=8760):
+    end = datetime.datetime(2020, 1, 1) + datetime.timedelta(hours=points)
+    payload = generate_payload('history/hourly', {'lat': '35.5', 'lon': '-78.5', 'start_date': '2020-01-01',
+                                                  'end_date': end.strftime('%Y-%m-%d:%H')})
+    content = json.dumps(payload).encode('utf-8')
+    print('{} points, JSON {:.2f} MB'.format(len(payload['data']), len(content) / 1e6))
+
+    for lean in [False, True]:
+        history = History(json.loads(content), None, {}, lean=lean)
+        history.json = None
+        data = history.to_bytes()
+        pickled = pickle.dumps(history.points, pickle.HIGHEST_PROTOCOL)
+        timings = [
+            ('to_bytes', lambda: history.to_bytes()),
+            ('from_bytes', lambda: History.from_bytes(data)),
+            ('pickle dumps', lambda: pickle.dumps(history.points, pickle.HIGHEST_PROTOCOL)),
+            ('pickle loads', lambda: pickle.loads(pickled)),
+        ]
+        print('{}: to_bytes {:.2f} MB, pickle {:.2f} MB'.format(
+            'lean' if lean else 'full', len(data) / 1e6, len(pickled) / 1e6))
+        for name, function in timings:
+            runs = timeit.repeat(function, number=3, repeat=3)
+            print('{:>14}: {:.1f} ms'.format(name, min(runs) / 3 * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
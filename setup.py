@@ -27,4 +27,5 @@ setup(
     package_data={'weatherbit': ['LICENSE.txt', 'README.md']},
     long_description=open('README.md').read(),
     install_requires=['requests>=1.6', 'responses'],
+    entry_points={'console_scripts': ['weatherbit=weatherbit.cli:main']},
 )
\ No newline at end of file
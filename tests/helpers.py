@@ -0,0 +1,52 @@
+"""
+Fixtures shared by the tests: a location, small history and normals
+payloads, and an Api answering from a FakeTransport.
+"""
+import datetime
+
+from weatherbit.api import Api
+from weatherbit.transport import FakeTransport
+
+LOCATION = {'lat': 35.7796, 'lon': -78.6382}
+
+
+def history_payload(_endpoint, query):
+    """
+    Three hourly points, precip is missing from the first point only.
+    """
+    data = []
+    for hour in range(3):
+        point = {'temp': 10.0 + hour, 'rh': 80,
+                 'datetime': '2020-01-01:{:02d}'.format(hour),
+                 'timestamp_utc': '2020-01-01T{:02d}:00:00'.format(hour),
+                 'timestamp_local': '2020-01-01T{:02d}:00:00'.format(hour)}
+        if hour:
+            point['precip'] = 0.5
+        data.append(point)
+    return {'city_name': query.get('city', 'Raleigh'), 'lat': float(query.get('lat', LOCATION['lat'])),
+            'lon': float(query.get('lon', LOCATION['lon'])), 'timezone': 'America/New_York', 'data': data}
+
+
+def normals_payload(_endpoint, query):
+    """
+    Daily normals of every day of the year, February 29 included.
+    """
+    data = []
+    day = datetime.date(2000, 1, 1)
+    while day.year == 2000:
+        temp = 10.0 + day.month
+        data.append({'month': day.month, 'day': day.day, 'temp': temp, 'max_temp': temp + 5, 'min_temp': temp - 5,
+                     'wind_spd': 3.0, 'wind_dir': 180, 'precip': 1.0})
+        day += datetime.timedelta(days=1)
+    return {'lat': float(query.get('lat', LOCATION['lat'])), 'lon': float(query.get('lon', LOCATION['lon'])),
+            'timezone': 'America/New_York', 'data': data}
+
+
+def make_api(payloads=None, transport=None, **kwargs):
+    """
+    An Api requesting hourly data (unless set in kwargs) from transport, by
+    default a FakeTransport serving payloads, and generated payloads.
+    """
+    kwargs.setdefault('granularity', 'hourly')
+    kwargs.setdefault('history_granularity', 'hourly')
+    return Api('key', transport=transport or FakeTransport(payloads), **kwargs)
@@ -0,0 +1,45 @@
+import datetime
+import unittest
+
+from tests.helpers import LOCATION, make_api
+
+
+class AggregateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.history = make_api().get_history(start_date='2020-01-01', end_date='2020-01-04', **LOCATION)
+
+    def test_resample_daily(self):
+        daily = self.history.resample('daily')
+        first_day = [point for point in self.history.points
+                     if point.timestamp_local.date() == datetime.date(2020, 1, 1)]
+        point = daily.points[1]
+        self.assertEqual(point.datetime, datetime.datetime(2020, 1, 1))
+        self.assertAlmostEqual(point.precip, sum(p.precip for p in first_day))
+        self.assertEqual(point.max_temp, max(p.temp for p in first_day))
+        self.assertAlmostEqual(point.temp, sum(p.temp for p in first_day) / len(first_day))
+
+    def test_rolling_sum(self):
+        rolled = self.history.rolling(3, ['precip'], how={'precip': 'sum'})
+        precip = [point.precip for point in self.history.points]
+        self.assertEqual(len(rolled.points), len(precip))
+        self.assertAlmostEqual(rolled.points[5].precip, sum(precip[3:6]))
+
+    def test_daily_extremes_only_for_daily_buckets(self):
+        self.assertIsNone(self.history.points[0].max_temp)
+        self.assertIsNone(self.history.resample('hourly').points[0].max_temp)
+        self.assertIsNone(self.history.resample(datetime.timedelta(hours=6)).points[0].min_temp)
+        self.assertIsNotNone(self.history.resample(datetime.timedelta(days=1)).points[0].max_temp)
+
+    def test_rolling_rejects_empty_windows(self):
+        for window in [datetime.timedelta(0), datetime.timedelta(hours=-1), 0, -2]:
+            with self.assertRaises(ValueError):
+                self.history.rolling(window, ['precip'])
+
+    def test_update_without_url(self):
+        daily = self.history.resample('daily')
+        with self.assertRaisesRegex(Exception, 'no request URL'):
+            daily.update()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from weatherbit.alerts import AlertWatcher
+from tests.helpers import make_api
+
+REGIONS = {'raleigh': {'lat': 35.78, 'lon': -78.64}, 'durham': {'lat': 35.99, 'lon': -78.90}}
+
+
+def make_alert(uri, description='Flooding.'):
+    return {'uri': uri, 'title': 'Flood Warning', 'description': description, 'severity': 'Warning',
+            'effective_utc': '2020-01-01T12:00:00', 'expires_utc': '2020-01-02T12:00:00', 'regions': ['Wake']}
+
+
+class AlertWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        # Latitude -> alerts of the region.
+        self.alerts = {}
+        self.api = make_api({'alerts': self.alerts_payload})
+        self.decoded = 0
+        json_loads = self.api.json_loads
+
+        def counting_loads(content):
+            self.decoded += 1
+            return json_loads(content)
+        self.api.json_loads = counting_loads
+        self.watcher = AlertWatcher(self.api, REGIONS)
+
+    def alerts_payload(self, _endpoint, query):
+        return {'lat': float(query['lat']), 'lon': float(query['lon']), 'alerts': self.alerts.get(float(query['lat']), [])}
+
+    def events(self):
+        return sorted((event.kind, event.uri, event.regions) for event in self.watcher.poll())
+
+    def test_new_updated_expired(self):
+        self.alerts[35.78] = [make_alert('a')]
+        self.assertEqual(self.events(), [('new', 'a', frozenset(['raleigh']))])
+
+        self.alerts[35.99] = [make_alert('a')]
+        self.assertEqual(self.events(), [])
+        self.assertEqual(self.watcher.active(), ['a'])
+
+        self.alerts[35.78] = self.alerts[35.99] = [make_alert('a', 'Flooding, and high winds.')]
+        self.assertEqual(self.events(), [('updated', 'a', frozenset(['raleigh', 'durham']))])
+
+        self.alerts[35.78] = []
+        self.assertEqual(self.events(), [])
+        self.alerts[35.99] = [make_alert('b')]
+        self.assertEqual(self.events(), [('expired', 'a', frozenset()), ('new', 'b', frozenset(['durham']))])
+        self.assertEqual(self.watcher.active(), ['b'])
+
+    def test_unchanged_poll_does_not_decode(self):
+        self.alerts[35.78] = [make_alert('a')]
+        self.events()
+        self.assertEqual(self.decoded, 2)
+        self.assertEqual(self.events(), [])
+        self.assertEqual(self.decoded, 2)
+        self.alerts[35.99] = [make_alert('b')]
+        self.assertEqual(self.events(), [('new', 'b', frozenset(['durham']))])
+        self.assertEqual(self.decoded, 3)
+
+    def test_event_regions_are_a_copy(self):
+        self.alerts[35.78] = [make_alert('a')]
+        event, = self.watcher.poll()
+        self.alerts[35.99] = [make_alert('a')]
+        self.watcher.poll()
+        self.assertEqual(event.regions, frozenset(['raleigh']))
+        with self.assertRaises(AttributeError):
+            event.regions.add('durham')
+
+    def test_failed_region_keeps_its_state(self):
+        self.alerts[35.78] = [make_alert('a')]
+        self.events()
+        self.api.transport.generate = False
+        self.api.transport.set_payload('alerts', lambda endpoint, query: None)
+        self.assertEqual(self.events(), [])
+        self.assertEqual(sorted(self.watcher.errors), ['durham', 'raleigh'])
+        self.assertEqual(self.watcher.active(), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
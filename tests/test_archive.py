@@ -0,0 +1,51 @@
+import shutil
+import datetime
+import tempfile
+import unittest
+
+from weatherbit.archive import HistoryArchive
+from tests.helpers import LOCATION, make_api
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.archive = HistoryArchive(self.path)
+        self.api = make_api()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def get_history(self, start_date, end_date):
+        return self.api.get_history(start_date=start_date, end_date=end_date, **LOCATION)
+
+    def test_round_trip(self):
+        history = self.get_history('2020-01-01', '2020-01-03')
+        self.assertEqual(self.archive.append(history, 'raleigh'), 48)
+        restored = self.archive.read('raleigh')
+        self.assertEqual(restored.get(), history.get())
+        for point in restored.get():
+            self.assertIs(type(point['rh']), int)
+            self.assertIs(type(point['clouds']), int)
+        self.assertEqual(restored.city_name, history.city_name)
+
+    def test_append_only_adds_newer_points(self):
+        self.archive.append(self.get_history('2020-01-01', '2020-01-02'), 'raleigh')
+        self.assertEqual(self.archive.append(self.get_history('2020-01-01', '2020-01-03'), 'raleigh'), 24)
+        restored = self.archive.read('raleigh', start=datetime.datetime(2020, 1, 1, 12),
+                                     end=datetime.datetime(2020, 1, 2, 12), api_vars=['temp'])
+        self.assertEqual(len(restored.points), 24)
+        self.assertEqual(restored.points[0].timestamp_utc, datetime.datetime(2020, 1, 1, 12))
+
+    def test_keeps_units(self):
+        history = self.get_history('2020-01-01', '2020-01-02').convert_units('I')
+        self.archive.append(history, 'raleigh')
+        restored = self.archive.read('raleigh')
+        self.assertEqual(restored.units, 'I')
+        self.assertEqual(restored.get(['temp']), history.get(['temp']))
+        with self.assertRaises(Exception):
+            self.archive.append(self.get_history('2020-01-02', '2020-01-03').convert_units('S'), 'raleigh')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from weatherbit.transport import FakeTransport, generate_payload
+from tests.helpers import make_api
+
+
+def history_payload(endpoint, query):
+    if float(query['lat']) < 0:
+        return None
+    return generate_payload(endpoint, query)
+
+
+class BulkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = make_api(transport=FakeTransport({'history/hourly': history_payload}, generate=False))
+
+    def test_failed_location_keeps_the_others(self):
+        locations = [{'lat': 35.5, 'lon': -78.5}, {'lat': -1.0, 'lon': 0.0}, {'lat': 40.7, 'lon': -74.0}]
+        errors = {}
+        histories = self.api.get_history_bulk(locations, start_date='2020-01-01', end_date='2020-01-02',
+                                              processes=2, errors=errors)
+        self.assertEqual(len(histories), 3)
+        self.assertIsNone(histories[1])
+        self.assertEqual(list(errors), [1])
+        for i in [0, 2]:
+            self.assertEqual(len(histories[i].points), 24)
+            self.assertEqual(histories[i].lat, locations[i]['lat'])
+
+
+if __name__ == '__main__':
+    unittest.main()
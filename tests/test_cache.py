@@ -0,0 +1,70 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from weatherbit.cache import SharedCache
+from weatherbit.transport import FakeTransport, DeadlineExceeded
+from tests.helpers import LOCATION, make_api
+
+
+class SharedCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = SharedCache(self.path, ttl=600)
+        self.calls = 0
+        self.transport = FakeTransport({'current': self.current_payload})
+        self.api = make_api(transport=self.transport, cache=self.cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def current_payload(self, _endpoint, _query):
+        self.calls += 1
+        return {'count': 1, 'data': [{'temp': float(self.calls), 'datetime': '2020-01-01:12',
+                                      'timestamp_utc': '2020-01-01T12:00:00', 'timestamp_local': '2020-01-01T07:00:00'}]}
+
+    def files(self, suffix):
+        return [name for _, _, names in os.walk(self.path) for name in names if name.endswith(suffix)]
+
+    def test_hit(self):
+        self.assertEqual(self.api.get_current(**LOCATION).points[0].temp, 1.0)
+        self.assertEqual(self.api.get_current(**LOCATION).points[0].temp, 1.0)
+        self.assertEqual(self.transport.requests, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_update_bypasses_the_cache(self):
+        current = self.api.get_current(**LOCATION)
+        current.update()
+        self.assertEqual(current.points[0].temp, 2.0)
+        self.assertEqual(self.transport.requests, 2)
+        # The fresh response replaced the cached one.
+        self.assertEqual(self.api.get_current(**LOCATION).points[0].temp, 2.0)
+        self.assertEqual(self.transport.requests, 2)
+
+    def test_lock_wait_within_the_deadline(self):
+        url = self.api.get_current_url(**LOCATION)
+        lock = self.cache._lock(url)
+        try:
+            started = time.time()
+            with self.assertRaises(DeadlineExceeded):
+                self.api.get_current(timeout=0.1, **LOCATION)
+            self.assertLess(time.time() - started, 0.3)
+        finally:
+            self.cache._unlock(lock)
+        self.assertEqual(self.transport.requests, 0)
+
+    def test_purge(self):
+        self.api.get_current(**LOCATION)
+        url = self.api.get_current_url(lat=1.0, lon=2.0)
+        self.cache.fetch(url, lambda: self.transport.get(url))
+        self.cache.set(url, self.transport.get(url), ttl=-1)
+        self.assertEqual(len(self.files('.lock')), 2)
+        self.assertEqual(self.cache.purge(), 1)
+        self.assertEqual(len(self.files('.lock')), 1)
+        self.assertEqual(self.api.get_current(**LOCATION).points[0].temp, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
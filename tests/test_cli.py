@@ -0,0 +1,87 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from weatherbit import cli
+from tests.helpers import history_payload, make_api
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.locations = os.path.join(self.path, 'locations.csv')
+        with open(self.locations, 'w') as f:
+            f.write('id,lat,lon\n1,35.5,-78.5\n2,40.7,-74.0\n')
+        self.output = os.path.join(self.path, 'history.ndjson')
+        self.argv = ['history', '--locations', self.locations, '--output', self.output, '--key', 'key',
+                     '--tp', 'hourly', '--start-date', '2020-01-01', '--end-date', '2020-01-02']
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def run_cli(self, argv):
+        args = cli.build_parser().parse_args(argv)
+        api = make_api({'history/hourly': history_payload}, lean=True)
+        writer = cli.NDJSONWriter(args.output)
+        checkpoint = cli.Checkpoint(args.output + '.checkpoint')
+        try:
+            return cli.run(api, args, cli.read_locations(args.locations), writer, checkpoint)
+        finally:
+            cli.finish(writer, checkpoint)
+
+    def read_rows(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_run(self):
+        self.assertEqual(self.run_cli(self.argv), (2, 0, 0))
+        rows = self.read_rows()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual([row.get('precip') for row in rows if row['id'] == '1'], [None, 0.5, 0.5])
+        self.assertEqual(self.run_cli(self.argv), (0, 2, 0))
+        self.assertEqual(len(self.read_rows()), 6)
+
+    def test_history_requires_a_time_period(self):
+        argv = [arg for arg in self.argv if arg not in ['--tp', 'hourly']]
+        with self.assertRaisesRegex(Exception, 'requires --tp'):
+            self.run_cli(argv)
+
+    def test_long_partial_line_is_dropped(self):
+        with open(self.output, 'wb') as f:
+            f.write(b'{"id": "0"}\n{"id": "1", "text": "' + b'x' * (3 * cli.TAIL_CHUNK))
+        cli.NDJSONWriter(self.output).close()
+        self.assertEqual(self.read_rows(), [{'id': '0'}])
+        with open(self.output, 'wb') as f:
+            f.write(b'{"id": "1", "text": "' + b'x' * (2 * cli.TAIL_CHUNK))
+        cli.NDJSONWriter(self.output).close()
+        self.assertEqual(os.path.getsize(self.output), 0)
+
+    def test_main_closes_the_output_once(self):
+        writer = mock.Mock()
+        checkpoint = mock.Mock()
+        with mock.patch.object(cli, 'NDJSONWriter', return_value=writer), \
+                mock.patch.object(cli, 'Checkpoint', return_value=checkpoint), \
+                mock.patch.object(cli, 'run', return_value=(2, 0, 0)):
+            self.assertEqual(cli.main(self.argv), 0)
+        writer.close.assert_called_once_with()
+        checkpoint.commit.assert_called_once_with()
+        checkpoint.close.assert_called_once_with()
+
+    def test_main_closes_the_output_when_run_fails(self):
+        writer = mock.Mock()
+        checkpoint = mock.Mock()
+        with mock.patch.object(cli, 'NDJSONWriter', return_value=writer), \
+                mock.patch.object(cli, 'Checkpoint', return_value=checkpoint), \
+                mock.patch.object(cli, 'run', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                cli.main(self.argv)
+        writer.close.assert_called_once_with()
+        checkpoint.commit.assert_called_once_with()
+        checkpoint.close.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
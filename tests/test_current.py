@@ -0,0 +1,46 @@
+import unittest
+
+from tests.helpers import LOCATION, make_api
+
+
+def current_payload(_endpoint, _query):
+    data = [{'city_name': 'Raleigh', 'station': station, 'temp': 10.0, 'datetime': '2020-01-01:12',
+             'timestamp_utc': '2020-01-01T12:00:00', 'timestamp_local': '2020-01-01T07:00:00'}
+            for station in ['KRDU', 'KTTA']]
+    minutely = [{'precip': 0.1 * i, 'timestamp_utc': '2020-01-01T12:{:02d}:00'.format(i),
+                 'timestamp_local': '2020-01-01T07:{:02d}:00'.format(i)} for i in range(60)]
+    alerts = [{'title': 'Flood Warning', 'uri': 'a', 'effective_utc': '2020-01-01T12:00:00'}]
+    return {'count': 2, 'data': data, 'minutely': minutely, 'alerts': alerts}
+
+
+class SharedListsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.current = make_api({'current': current_payload}).get_current(include='minutely,alerts', **LOCATION)
+
+    def test_lists_are_shared_by_the_points(self):
+        series = self.current.get()
+        self.assertEqual(len(series), 2)
+        minutely, alerts = self.current.get_minutely(), self.current.get_alerts()
+        self.assertEqual(len(minutely), 60)
+        self.assertEqual(alerts[0]['uri'], 'a')
+        for point in series:
+            self.assertIs(point['minutely'], minutely)
+            self.assertIs(point['alerts'], alerts)
+
+    def test_lists_are_built_once(self):
+        first = self.current.get()
+        second = self.current.get(['temp'])
+        self.assertIs(second[0]['minutely'], first[0]['minutely'])
+        self.assertIs(self.current.get_alerts(), first[0]['alerts'])
+
+    def test_lists_are_rebuilt_on_change(self):
+        minutely = self.current.get_minutely()
+        self.current.convert_units('I')
+        self.assertIsNot(self.current.get_minutely(), minutely)
+        self.current.update()
+        self.assertIs(self.current.get()[0]['minutely'], self.current.get_minutely())
+        self.assertAlmostEqual(self.current.get_minutely()[10]['precip'], 1.0 / 25.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from weatherbit.derived import _extraterrestrial_radiation
+from tests.helpers import LOCATION, make_api, normals_payload
+
+
+class DerivedTestCase(unittest.TestCase):
+    def derive(self, name, points, units='M', lat=35.78, **params):
+        def payload(_endpoint, _query):
+            return {'lat': lat, 'lon': -78.64, 'timezone': 'America/New_York',
+                    'data': [dict(point, datetime='2019-09-{:02d}'.format(i + 3)) for i, point in enumerate(points)]}
+        api = make_api({'forecast/daily': payload}, granularity='daily')
+        return api.get_forecast(units=units, **LOCATION).derive(name, **params)
+
+    def test_heat_index(self):
+        # NWS heat index chart: 90F at 70% humidity feels like 106F.
+        values = self.derive('heat_index', [{'temp': 90, 'rh': 70}, {'temp': 70, 'rh': 50}, {'temp': 90}], units='I')
+        self.assertAlmostEqual(values[0], 105.9, places=1)
+        # Below 80F, Steadman's approximation.
+        self.assertAlmostEqual(values[1], 69.05)
+        self.assertIsNone(values[2])
+        celsius = self.derive('heat_index', [{'temp': 32.22, 'rh': 70}])
+        self.assertAlmostEqual(celsius[0], (105.9 - 32) * 5 / 9, places=1)
+
+    def test_wind_chill(self):
+        # NWS wind chill chart: 0F with a 15 mph wind feels like -19F.
+        values = self.derive('wind_chill', [{'temp': 0, 'wind_spd': 15}, {'temp': 60, 'wind_spd': 15}], units='I')
+        self.assertAlmostEqual(values[0], -19.4, places=1)
+        self.assertEqual(values[1], 60)
+
+    def test_degree_days(self):
+        points = [{'max_temp': 30, 'min_temp': 10}, {'max_temp': 15, 'min_temp': 5}, {'temp': 35}]
+        # The cap applies to max_temp and min_temp, not to a mean temp.
+        self.assertEqual(self.derive('gdd', points), [10.0, 2.5, 25.0])
+        self.assertEqual(self.derive('gdd', points, base=5.0, cap=25.0), [12.5, 5.0, 30.0])
+        for actual, expected in zip(self.derive('hdd', points), [0.0, 8.3, 0.0]):
+            self.assertAlmostEqual(actual, expected)
+        for actual, expected in zip(self.derive('cdd', points), [1.7, 0.0, 16.7]):
+            self.assertAlmostEqual(actual, expected)
+        # 65F base, in Fahrenheit degree days.
+        self.assertAlmostEqual(self.derive('hdd', [{'temp': 50}], units='I')[0], 15.0, delta=0.1)
+
+    def test_wind_components(self):
+        points = [{'wind_spd': 10, 'wind_dir': 270}, {'wind_spd': 10, 'wind_dir': 180}, {'wind_spd': 10}]
+        u, v = self.derive('wind_u', points), self.derive('wind_v', points)
+        # From the west blows eastward, from the south northward.
+        self.assertAlmostEqual(u[0], 10.0)
+        self.assertAlmostEqual(v[0], 0.0)
+        self.assertAlmostEqual(u[1], 0.0)
+        self.assertAlmostEqual(v[1], 10.0)
+        self.assertEqual((u[2], v[2]), (None, None))
+
+    def test_et0(self):
+        # FAO-56 example 8: 32.2 MJ/m2/day at 20S on September 3.
+        self.assertAlmostEqual(_extraterrestrial_radiation(-20, 246), 32.2, places=1)
+        values = self.derive('et0', [{'max_temp': 30, 'min_temp': 20}, {'temp': 25}], lat=-20)
+        self.assertAlmostEqual(values[0], 0.0023 * 0.408 * 32.194 * (25 + 17.8) * 10 ** 0.5, places=3)
+        self.assertIsNone(values[1])
+
+    def test_normals_leap_day(self):
+        api = make_api({'normals': normals_payload}, history_granularity='daily')
+        normals = api.get_normals(start_day='01-01', end_day='12-31', **LOCATION)
+        values = normals.derive('et0')
+        self.assertEqual(len(values), 366)
+        self.assertNotIn(None, values)
+        feb_28 = normals.points.index(normals.at(2, 28))
+        self.assertLess(values[feb_28], values[feb_28 + 1])
+        self.assertLess(values[feb_28 + 1], values[feb_28 + 2])
+
+    def test_current_conditions(self):
+        current = make_api().get_current(**LOCATION)
+        temp = current.points[0].temp
+        self.assertAlmostEqual(current.derive('hdd')[0], max(0.0, 18.3 - temp))
+        self.assertEqual(current.derive('et0'), [None])
+        self.assertEqual(len(current.derive('heat_index')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from weatherbit.join import join_series
+from tests.helpers import LOCATION, make_api
+
+
+class JoinTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = make_api()
+
+    def test_columns(self):
+        table = self.api.get_joined(sources=[None, 'airquality'], **LOCATION)
+        weather = self.api.get_forecast(**LOCATION)
+        airquality = self.api.get_forecast('airquality', **LOCATION)
+        # 48 hourly weather points, 72 hourly air quality points.
+        self.assertEqual(len(table['timestamp_utc']), 72)
+        self.assertEqual(table['temp'][:48], [point.temp for point in weather.points])
+        self.assertEqual(table['temp'][48:], [None] * 24)
+        self.assertEqual(table['airquality_aqi'], [point.aqi for point in airquality.points])
+        self.assertNotIn('aqi', table)
+
+    def test_columns_do_not_depend_on_other_sources(self):
+        alone = self.api.get_joined(sources=['airquality'], **LOCATION)
+        joined = self.api.get_joined(sources=[None, 'airquality'], **LOCATION)
+        self.assertTrue(set(alone) <= set(joined))
+
+    def test_inner_join_with_prefixes(self):
+        table = self.api.get_joined(sources=[None, 'airquality'], how='inner', prefixes={'weather': 'wx_', 'airquality': 'aq_'},
+                                    **LOCATION)
+        self.assertEqual(len(table['timestamp_utc']), 48)
+        self.assertIn('wx_temp', table)
+        self.assertIn('aq_pm25', table)
+
+    def test_no_sources(self):
+        with self.assertRaisesRegex(Exception, 'At least one source'):
+            self.api.get_joined(sources=[], **LOCATION)
+
+    def test_conflicting_prefixes(self):
+        forecast = self.api.get_forecast(**LOCATION)
+        with self.assertRaises(Exception):
+            join_series([('weather', forecast), ('copy', forecast)], prefixes={'copy': ''})
+
+
+if __name__ == '__main__':
+    unittest.main()
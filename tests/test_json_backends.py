@@ -0,0 +1,54 @@
+import sys
+import json
+import types
+import unittest
+from unittest import mock
+
+from weatherbit.utils import get_json_loads
+from tests.helpers import LOCATION, make_api
+
+
+def fake_backend(name):
+    module = types.ModuleType(name)
+    module.loads = lambda content: {'backend': name}
+    return module
+
+
+class JsonBackendTestCase(unittest.TestCase):
+    def backends(self, **modules):
+        # None makes the import of a module fail.
+        installed = dict((name, None) for name in ['orjson', 'simdjson', 'ujson'])
+        installed.update(modules)
+        return mock.patch.dict(sys.modules, installed)
+
+    def test_prefers_orjson(self):
+        with self.backends(orjson=fake_backend('orjson'), simdjson=fake_backend('simdjson'), ujson=fake_backend('ujson')):
+            self.assertEqual(get_json_loads()(b'{}'), {'backend': 'orjson'})
+
+    def test_falls_back_in_order(self):
+        with self.backends(simdjson=fake_backend('simdjson'), ujson=fake_backend('ujson')):
+            self.assertEqual(get_json_loads()(b'{}'), {'backend': 'simdjson'})
+        with self.backends(ujson=fake_backend('ujson')):
+            self.assertEqual(get_json_loads()(b'{}'), {'backend': 'ujson'})
+        with self.backends():
+            self.assertIs(get_json_loads(), json.loads)
+
+    def test_explicit_backend(self):
+        with self.backends(orjson=fake_backend('orjson'), ujson=fake_backend('ujson')):
+            self.assertEqual(get_json_loads('ujson')(b'{}'), {'backend': 'ujson'})
+            self.assertIs(get_json_loads('json'), json.loads)
+            with self.assertRaises(ImportError):
+                get_json_loads('simdjson')
+        with self.assertRaises(Exception):
+            get_json_loads('yaml')
+
+    def test_api_decodes_with_the_backend(self):
+        api = make_api(json_backend='json')
+        self.assertIs(api.json_loads, json.loads)
+        self.assertEqual(len(api.get_forecast(**LOCATION).points), 48)
+        api.set_json_backend(None)
+        self.assertEqual(len(api.get_forecast(**LOCATION).points), 48)
+
+
+if __name__ == '__main__':
+    unittest.main()
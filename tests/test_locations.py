@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from weatherbit.locations import LocationResolver
+from tests.helpers import make_api
+
+# City, state -> coordinates of the fake API.
+CITIES = {('springfield', 'IL'): (39.8, -89.65), ('springfield', 'MO'): (37.21, -93.29), ('raleigh', 'NC'): (35.78, -78.64)}
+
+
+def forecast_payload(_endpoint, query):
+    if 'lat' in query:
+        lat, lon = float(query['lat']), float(query['lon'])
+    else:
+        city, _, state = query['city'].lower().replace(' ', '').partition(',')
+        key = (city, (query.get('state') or state).upper())
+        if key not in CITIES:
+            return None
+        lat, lon = CITIES[key]
+    return {'city_name': query.get('city', 'Springfield'), 'lat': lat, 'lon': lon, 'timezone': 'America/Chicago', 'data': [
+        {'temp': 20.0, 'datetime': '2020-01-01:00', 'timestamp_utc': '2020-01-01T00:00:00', 'timestamp_local': '2020-01-01T00:00:00'}]}
+
+
+class LocationResolverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.resolver = LocationResolver(os.path.join(self.path, 'locations.json'))
+        self.api = make_api({'forecast/hourly': forecast_payload}, resolver=self.resolver)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_spellings_share_the_coordinates_url(self):
+        first = self.api.get_forecast(city='Raleigh,NC')
+        self.assertIn('city=Raleigh', first.url)
+        second = self.api.get_forecast(city=' raleigh , nc')
+        self.assertIn('lat=35.78&lon=-78.64', second.url)
+        self.assertNotIn('city=', second.url)
+        self.assertEqual(self.resolver.resolve({'city': 'RALEIGH,NC'})['lat'], 35.78)
+
+    def test_learned_locations_persist(self):
+        self.api.get_forecast(city='Raleigh,NC')
+        resolver = LocationResolver(self.resolver.path)
+        self.assertEqual(resolver.rewrite({'city': 'raleigh,nc', 'units': 'I'}), {'lat': 35.78, 'lon': -78.64, 'units': 'I'})
+
+    def test_ambiguous_names(self):
+        self.api.get_forecast(city='Springfield', state='IL')
+        self.api.get_forecast(city='Springfield', state='MO')
+        self.assertEqual(self.resolver.resolve({'city': 'springfield', 'state': 'il'})['lat'], 39.8)
+        self.assertEqual(self.resolver.resolve({'city': 'springfield', 'state': 'mo'})['lat'], 37.21)
+        # Without a state, neither one.
+        self.assertIsNone(self.resolver.resolve({'city': 'Springfield'}))
+        self.assertEqual(self.resolver.rewrite({'city': 'Springfield'}), {'city': 'Springfield'})
+
+    def test_not_found(self):
+        with self.assertRaises(Exception):
+            self.api.get_forecast(city='Nowhere', state='NC')
+        self.assertIsNone(self.resolver.resolve({'city': 'Nowhere', 'state': 'NC'}))
+        self.assertFalse(os.path.exists(self.resolver.path))
+
+    def test_coordinate_queries_are_not_learned(self):
+        self.api.get_forecast(lat=35.78, lon=-78.64)
+        self.assertIsNone(self.resolver.query_key({'lat': 35.78, 'lon': -78.64}))
+        self.assertFalse(os.path.exists(self.resolver.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
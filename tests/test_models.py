@@ -0,0 +1,38 @@
+import datetime
+import unittest
+
+from tests.helpers import LOCATION, history_payload, make_api
+
+
+def get_history(lean):
+    api = make_api({'history/hourly': history_payload}, lean=lean)
+    return api.get_history(start_date='2020-01-01', end_date='2020-01-02', **LOCATION)
+
+
+class LeanTestCase(unittest.TestCase):
+    def test_get_matches_full_mode(self):
+        full = get_history(False).get()
+        lean = get_history(True).get()
+        self.assertEqual(lean, full)
+
+    def test_get_includes_vars_missing_from_first_point(self):
+        series = get_history(True).get()
+        self.assertNotIn('precip', series[0])
+        self.assertEqual([point.get('precip') for point in series[1:]], [0.5, 0.5])
+
+    def test_missing_attribute_does_not_add_columns(self):
+        history = get_history(True)
+        self.assertIsNone(history.points[0].precip)
+        series = history.get()
+        self.assertEqual([name for point in series for name in point if name.startswith('_')], [])
+        self.assertEqual(series[0]['timestamp_utc'], datetime.datetime(2020, 1, 1, 0))
+
+    def test_dropped_attributes_read_as_none(self):
+        point = get_history(True).points[0]
+        self.assertIsNone(point.snow)
+        with self.assertRaises(AttributeError):
+            point.not_a_variable
+
+
+if __name__ == '__main__':
+    unittest.main()
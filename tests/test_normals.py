@@ -0,0 +1,86 @@
+import time
+import threading
+import unittest
+
+from weatherbit.normals import NormalsStore
+from weatherbit.transport import FakeTransport
+from tests.helpers import LOCATION, make_api, normals_payload
+
+
+class NormalsSliceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.normals = make_api(history_granularity='daily').get_normals(start_day='01-01', end_day='12-31', **LOCATION)
+
+    def days(self, series):
+        return [(point['month'], point['day']) for point in series]
+
+    def test_slice_wraps_across_the_year(self):
+        view = self.normals.slice((12, 27), (1, 3))
+        expected = [(12, 27), (12, 28), (1, 1), (1, 2)]
+        self.assertEqual(self.days(view.get()), expected)
+        self.assertEqual(self.days(view.iter_series()), expected)
+        self.assertEqual([(row[-3], row[-2]) for row in view.iter_series(['temp'], as_tuples=True)], expected)
+
+    def test_slice_within_the_year(self):
+        view = self.normals.slice((3, 1), (3, 4))
+        self.assertEqual(self.days(view.get()), [(3, 1), (3, 2), (3, 3)])
+        self.assertEqual(view.get(['temp']), [point for point in self.normals.get(['temp'])
+                                              if point['month'] == 3 and point['day'] < 4])
+
+    def test_rows_carry_the_day(self):
+        rows = self.normals.get()
+        self.assertEqual([(row['month'], row['day'], row['hour']) for row in rows],
+                         [(point.month, point.day, point.hour) for point in self.normals.points])
+        self.assertEqual(rows[40]['day'], 13)
+        self.assertEqual(list(self.normals.iter_series()), rows)
+
+    def test_get_is_sorted(self):
+        days = self.days(self.normals.get())
+        self.assertEqual(days, sorted(days))
+        self.assertEqual(len(days), 12 * 28)
+
+
+class NormalsStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.store = NormalsStore(make_api(transport=self.transport, history_granularity='daily'))
+
+    def test_window_wraps_across_the_year(self):
+        normals = self.store.get_normals(start_day='12-27', end_day='01-03', **LOCATION)
+        expected = [(12, 27), (12, 28), (1, 1), (1, 2), (1, 3)]
+        self.assertEqual([(point['month'], point['day']) for point in normals.get()], expected)
+        self.assertEqual([(point['month'], point['day']) for point in normals.iter_series()], expected)
+        self.assertIs(normals.at(1, 2), normals.points[3])
+        self.assertIsNone(normals.at(6, 1))
+
+    def test_window_includes_end_day(self):
+        store = NormalsStore(make_api({'normals': normals_payload}, history_granularity='daily'))
+        days = lambda normals: [(point['month'], point['day']) for point in normals.get()]
+        self.assertEqual(days(store.get_normals(start_day='12-30', end_day='12-31', **LOCATION)), [(12, 30), (12, 31)])
+        self.assertEqual(days(store.get_normals(start_day='02-29', end_day='02-29', **LOCATION)), [(2, 29)])
+        self.assertEqual(days(store.get_normals(start_day='12-31', end_day='01-01', **LOCATION)), [(12, 31), (1, 1)])
+        self.assertEqual(len(store.get_normals(start_day='01-02', end_day='01-01', **LOCATION).points), 366)
+
+    def test_fetches_each_table_once(self):
+        self.store.get_normals(start_day='03-01', end_day='04-01', **LOCATION)
+        self.store.get_normals(start_day='12-15', end_day='01-15', **LOCATION)
+        self.store.get_normals(start_day='12-15', end_day='01-15', lat=str(LOCATION['lat']), lon=str(LOCATION['lon']))
+        self.assertEqual(self.transport.requests, 1)
+        self.store.get_normals(start_day='03-01', end_day='04-01', lat=40.7, lon=-74.0)
+        self.assertEqual(self.transport.requests, 2)
+
+    def test_slow_fetch_does_not_block_other_tables(self):
+        self.transport.latency = 0.5
+        thread = threading.Thread(target=self.store.get_table, kwargs=LOCATION)
+        thread.start()
+        time.sleep(0.1)
+        self.transport.latency = 0.0
+        started = time.time()
+        self.store.get_table(lat=40.7, lon=-74.0)
+        self.assertLess(time.time() - started, 0.3)
+        thread.join()
+        self.assertEqual(self.transport.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
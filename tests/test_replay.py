@@ -0,0 +1,89 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from weatherbit.replay import RecordingTransport, ReplayTransport, normalize_url, read_archive
+from weatherbit.transport import FakeTransport, DeadlineExceeded
+from tests.helpers import LOCATION, make_api
+
+URL = 'https://api.weatherbit.io/v2.0/forecast/daily?lon=-78.5&lat=35.5&key=secret'
+
+
+class ReplayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'traffic.wbr')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, *urls):
+        recording = RecordingTransport(self.path, FakeTransport())
+        responses = [recording.get(url) for url in urls]
+        recording.close()
+        return responses
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url(URL), '/v2.0/forecast/daily?lat=35.5&lon=-78.5')
+
+    def test_replays_the_recorded_bytes(self):
+        recorded, = self.record(URL)
+        (meta, content), = read_archive(self.path)
+        self.assertNotIn('secret', meta['url'])
+        replay = ReplayTransport(self.path, latency=None)
+        self.assertEqual(replay.urls(), [meta['url']])
+        response = replay.get(URL.replace('key=secret', 'key=other'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, recorded.content)
+        self.assertEqual(response.content, content)
+
+    def test_api_round_trip(self):
+        api = make_api(granularity='daily')
+        recording = api.record(self.path)
+        recorded = api.get_forecast(**LOCATION)
+        recording.close()
+        replay_api = make_api(granularity='daily')
+        replay_api.replay(self.path, latency=None, strict=True)
+        replayed = replay_api.get_forecast(**LOCATION)
+        self.assertEqual(replayed.get_series(['temp', 'precip']), recorded.get_series(['temp', 'precip']))
+        self.assertEqual(replay_api.transport.requests, 1)
+
+    def test_unknown_urls(self):
+        self.record(URL)
+        other = URL.replace('forecast/daily', 'current')
+        self.assertEqual(ReplayTransport(self.path).get(other).status_code, 404)
+        with self.assertRaises(Exception):
+            ReplayTransport(self.path, strict=True).get(other)
+
+    def test_repeated_urls_are_served_in_turn(self):
+        transport = FakeTransport(generate=False)
+        turns = iter([{'data': [1]}, {'data': [2]}])
+        transport.set_payload('forecast/daily', lambda endpoint, query: next(turns))
+        recording = RecordingTransport(self.path, transport)
+        recording.get(URL)
+        recording.get(URL)
+        recording.close()
+        replay = ReplayTransport(self.path, latency=None)
+        self.assertEqual([replay.get(URL).json()['data'] for _ in range(3)], [[1], [2], [1]])
+
+    def test_latency_over_the_timeout(self):
+        self.record(URL)
+        with self.assertRaises(DeadlineExceeded):
+            ReplayTransport(self.path, latency=0.5).get(URL, timeout=0.05)
+
+    def test_seeded_latencies(self):
+        self.record(URL)
+        latencies = [0.1, 0.2, 0.3, 0.4]
+        first = ReplayTransport(self.path, latency=latencies, seed=7)
+        second = ReplayTransport(self.path, latency=latencies, seed=7)
+        state = random.getstate()
+        sampled = [first._delay(0.0) for _ in range(20)]
+        self.assertEqual(sampled, [second._delay(0.0) for _ in range(20)])
+        self.assertGreater(len(set(sampled)), 1)
+        self.assertEqual(random.getstate(), state)
+
+
+if __name__ == '__main__':
+    unittest.main()
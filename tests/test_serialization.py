@@ -0,0 +1,47 @@
+import unittest
+
+from weatherbit.models import Forecast, History, Current
+from tests.helpers import LOCATION, make_api
+
+
+def responses(lean):
+    api = make_api(lean=lean)
+    return [
+        (Forecast, api.get_forecast(**LOCATION)),
+        (History, api.get_history(start_date='2020-01-01', end_date='2020-01-03', **LOCATION)),
+        (Current, api.get_current(**LOCATION)),
+    ]
+
+
+def types(series):
+    return [dict((name, type(value)) for name, value in point.items()) for point in series]
+
+
+class RoundTripTestCase(unittest.TestCase):
+    def check_round_trip(self, lean):
+        for response_class, response in responses(lean):
+            restored = response_class.from_bytes(response.to_bytes())
+            self.assertEqual(restored.get(), response.get())
+            self.assertEqual(types(restored.get()), types(response.get()))
+            self.assertEqual(restored.url, response.url)
+            for field in response._meta_fields:
+                self.assertEqual(getattr(restored, field, None), getattr(response, field, None))
+
+    def test_round_trip(self):
+        self.check_round_trip(False)
+
+    def test_round_trip_lean(self):
+        self.check_round_trip(True)
+
+    def test_restored_serializes_identically(self):
+        for response_class, response in responses(True):
+            data = response.to_bytes()
+            self.assertEqual(response_class.from_bytes(data).to_bytes(), data)
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(Exception):
+            History.from_bytes(b'{"data": []}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from weatherbit.models import Point
+from tests.helpers import LOCATION, make_api
+
+TIME_VARS = ['datetime', 'timestamp_utc', 'timestamp_local']
+
+
+class StreamingTestCase(unittest.TestCase):
+    def test_rows_match_get(self):
+        for lean in [False, True]:
+            history = make_api(lean=lean).get_history(start_date='2020-01-01', end_date='2020-01-03', **LOCATION)
+            self.assertEqual(list(history.iter_series()), history.get())
+            self.assertEqual(list(history.iter_series(['temp'])), history.get(['temp']))
+            batches = list(history.iter_series(['temp'], batch_size=10))
+            self.assertEqual([len(batch) for batch in batches], [10, 10, 10, 10, 8])
+
+    def test_tuple_columns_are_stable(self):
+        full = make_api(lean=False).get_forecast(**LOCATION)
+        lean = make_api(lean=True).get_forecast(**LOCATION)
+        columns = full.series_columns()
+        self.assertEqual(lean.series_columns(), columns)
+        self.assertEqual(columns[-3:], TIME_VARS)
+        self.assertEqual(len(columns), len(Point._field_names()))
+        self.assertFalse([name for name in columns if name.startswith('_')])
+        rows = list(lean.iter_series(as_tuples=True))
+        self.assertEqual(rows, list(full.iter_series(as_tuples=True)))
+        self.assertEqual(set(len(row) for row in rows), set([len(columns)]))
+        for row, point in zip(rows, full.get()):
+            self.assertEqual(dict((name, value) for name, value in zip(columns, row) if value is not None), point)
+
+    def test_requested_columns(self):
+        forecast = make_api(lean=True).get_forecast(**LOCATION)
+        self.assertEqual(forecast.series_columns(['temp', 'rh']), ['temp', 'rh'] + TIME_VARS)
+        view = forecast.slice()
+        self.assertEqual(view.series_columns(['temp']), ['temp'] + TIME_VARS)
+
+    def test_current_columns(self):
+        current = make_api(lean=True).get_current(**LOCATION)
+        columns = current.series_columns()
+        self.assertEqual(columns[-2:], ['minutely', 'alerts'])
+        self.assertIn('sunrise', columns)
+        row, = current.iter_series(as_tuples=True)
+        self.assertEqual(len(row), len(columns))
+
+
+if __name__ == '__main__':
+    unittest.main()
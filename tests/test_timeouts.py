@@ -0,0 +1,76 @@
+import time
+import threading
+import unittest
+
+import requests
+
+from weatherbit.hedging import Hedger
+from weatherbit.transport import FakeTransport, DeadlineExceeded
+from tests.helpers import LOCATION, make_api
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def check_deadline(self, api, timeout=0.1):
+        api.transport.latency = 0.5
+        started = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            api.get_current(timeout=timeout, **LOCATION)
+        self.assertLess(time.time() - started, 0.4)
+
+    def test_deadline(self):
+        self.check_deadline(make_api())
+
+    def test_deadline_with_retries(self):
+        self.check_deadline(make_api(retries=3), timeout=0.2)
+
+    def test_deadline_hedged(self):
+        api = make_api(transport=FakeTransport(latency=0.01), hedge=Hedger(max_rate=1.0, min_delay=0.01, min_samples=10))
+        for _ in range(10):
+            api.get_current(timeout=1, **LOCATION)
+        self.assertIsNotNone(api.hedger.metrics()['delay'])
+        self.check_deadline(api)
+
+    def test_is_a_requests_timeout(self):
+        self.assertTrue(issubclass(DeadlineExceeded, requests.exceptions.Timeout))
+
+    def test_within_deadline(self):
+        api = make_api(transport=FakeTransport(latency=0.01))
+        self.assertEqual(len(api.get_current(timeout=1, **LOCATION).points), 1)
+
+
+
+class HedgerTestCase(unittest.TestCase):
+    def make_hedger(self, min_delay):
+        hedger = Hedger(max_rate=1.0, min_delay=min_delay, min_samples=10)
+        for _ in range(10):
+            hedger.call(lambda timeout: None, 1)
+        self.assertEqual(hedger.metrics()['delay'], min_delay)
+        return hedger
+
+    def test_concurrent_callers_are_not_queued(self):
+        hedger = self.make_hedger(0.15)
+        threads = [threading.Thread(target=hedger.call, args=(lambda timeout: time.sleep(0.05), 1)) for _ in range(128)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(hedger.metrics()['hedged'], 0)
+
+    def test_hedge_gets_the_time_left(self):
+        hedger = self.make_hedger(0.05)
+        timeouts = []
+
+        def fetch(timeout):
+            timeouts.append(timeout)
+            if len(timeouts) == 1:
+                time.sleep(0.3)
+            return len(timeouts)
+
+        self.assertEqual(hedger.call(fetch, 1.0), 2)
+        self.assertEqual(timeouts[0], 1.0)
+        self.assertLess(timeouts[1], 0.96)
+        self.assertEqual(hedger.metrics()['hedge_wins'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
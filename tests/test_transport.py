@@ -0,0 +1,125 @@
+import sys
+import time
+import types
+import unittest
+from unittest import mock
+
+from weatherbit.transport import (Transport, FakeTransport, RequestsTransport, HTTP2Transport, DeadlineExceeded,
+                                  generate_payload)
+
+URL = 'https://api.weatherbit.io/v2.0/forecast/daily?key=key&lat=35.5&lon=-78.5'
+
+
+def slow_chunks(count, delay):
+    for _ in range(count):
+        time.sleep(delay)
+        yield b'{}'
+
+
+class FakeTransportTestCase(unittest.TestCase):
+    def test_generated_payloads(self):
+        transport = FakeTransport()
+        response = transport.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']), 16)
+        self.assertEqual(transport.get(URL.replace('key=key', 'key=other')).content, response.content)
+        self.assertEqual(response.json(), generate_payload('forecast/daily', {'lat': '35.5', 'lon': '-78.5'}))
+        self.assertEqual(transport.requests, 2)
+
+    def test_unknown_endpoints(self):
+        transport = FakeTransport({'current': {'data': []}}, generate=False)
+        self.assertEqual(transport.get(URL).status_code, 404)
+        self.assertEqual(transport.get(URL.replace('forecast/daily', 'current')).json(), {'data': []})
+
+    def test_latency_within_the_deadline(self):
+        transport = FakeTransport(latency=0.5)
+        started = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            transport.get(URL, timeout=0.05)
+        self.assertLess(time.time() - started, 0.3)
+
+
+class RequestsTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.transport = RequestsTransport()
+        self.response = mock.Mock(url=URL, status_code=200, headers={})
+        self.transport.session = mock.Mock()
+        self.transport.session.get.return_value = self.response
+
+    def test_body_within_the_deadline(self):
+        self.response.iter_content.return_value = slow_chunks(3, 0.0)
+        self.assertEqual(self.transport.get(URL, timeout=1).content, b'{}{}{}')
+        self.response.close.assert_called_once_with()
+
+    def test_slow_body_past_the_deadline(self):
+        self.response.iter_content.return_value = slow_chunks(20, 0.05)
+        started = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            self.transport.get(URL, timeout=0.2)
+        self.assertLess(time.time() - started, 0.5)
+        self.response.close.assert_called_once_with()
+
+
+class FakeStream(object):
+    def __init__(self, chunks, error=None):
+        self.url = URL
+        self.status_code = 200
+        self.headers = {}
+        self.chunks = chunks
+        self.error = error
+
+    def __enter__(self):
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def iter_bytes(self):
+        return self.chunks
+
+
+def fake_httpx():
+    # The parts of httpx used by HTTP2Transport.
+    httpx = types.ModuleType('httpx')
+    httpx.TransportError = type('TransportError', (Exception,), {})
+    httpx.TimeoutException = type('TimeoutException', (httpx.TransportError,), {})
+    httpx.Limits = mock.Mock()
+    httpx.Client = mock.Mock()
+    return httpx
+
+
+class HTTP2TransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.httpx = fake_httpx()
+        with mock.patch.dict(sys.modules, {'httpx': self.httpx}):
+            self.transport = HTTP2Transport()
+        self.client = self.transport.client
+
+    def test_body_within_the_deadline(self):
+        self.client.stream.return_value = FakeStream(slow_chunks(2, 0.0))
+        self.assertEqual(self.transport.get(URL, timeout=1).content, b'{}{}')
+
+    def test_slow_body_past_the_deadline(self):
+        self.client.stream.return_value = FakeStream(slow_chunks(20, 0.05))
+        started = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            self.transport.get(URL, timeout=0.2)
+        self.assertLess(time.time() - started, 0.5)
+
+    def test_httpx_timeouts(self):
+        self.client.stream.return_value = FakeStream([], self.httpx.TimeoutException('read timeout'))
+        with self.assertRaises(DeadlineExceeded):
+            self.transport.get(URL, timeout=0.2)
+        self.assertTrue(issubclass(DeadlineExceeded, self.transport.retry_exceptions))
+
+
+class TransportTestCase(unittest.TestCase):
+    def test_base_class(self):
+        with self.assertRaises(NotImplementedError):
+            Transport().get(URL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from weatherbit.models import Forecast
+from tests import helpers
+from tests.helpers import LOCATION
+
+
+def forecast_payload(_endpoint, query):
+    temp = {'M': 20.0, 'I': 68.0, 'S': 293.15}[query.get('units', 'M')]
+    return {'city_name': 'Raleigh', 'lat': 35.7796, 'lon': -78.6382, 'timezone': 'America/New_York', 'data': [
+        {'temp': temp, 'rh': 50, 'datetime': '2020-01-01:00',
+         'timestamp_utc': '2020-01-01T00:00:00', 'timestamp_local': '2019-12-31T19:00:00'}]}
+
+
+def make_api(**kwargs):
+    return helpers.make_api({'forecast/hourly': forecast_payload}, **kwargs)
+
+
+class UnitsTestCase(unittest.TestCase):
+    def test_units_of_the_request(self):
+        self.assertEqual(make_api().get_forecast(**LOCATION).units, 'M')
+        self.assertEqual(make_api().get_forecast(units='I', **LOCATION).units, 'I')
+
+    def test_convert_from_the_fetched_units(self):
+        forecast = make_api().get_forecast(units='I', **LOCATION).convert_units('S')
+        self.assertAlmostEqual(forecast.points[0].temp, 293.15)
+        self.assertEqual(forecast.points[0].rh, 50)
+        forecast.update()
+        self.assertAlmostEqual(forecast.points[0].temp, 293.15)
+
+    def test_canonical_units(self):
+        api = make_api(canonical_units='M')
+        forecast = api.get_forecast(units='I', **LOCATION)
+        self.assertEqual(forecast.units, 'I')
+        self.assertEqual(forecast.url, make_api().get_forecast(units='M', **LOCATION).url)
+        self.assertAlmostEqual(forecast.points[0].temp, 68.0)
+
+    def test_update_after_from_bytes(self):
+        api = make_api(canonical_units='M')
+        forecast = api.get_forecast(units='I', **LOCATION)
+        restored = Forecast.from_bytes(forecast.to_bytes(), loader=api._refresh)
+        restored.update()
+        self.assertEqual(restored.units, 'I')
+        self.assertAlmostEqual(restored.points[0].temp, 68.0)
+
+    def test_update_after_resample(self):
+        api = make_api(canonical_units='M')
+        hourly = api.get_forecast(units='I', **LOCATION)
+        daily = hourly.resample('daily')
+        self.assertEqual(daily.units, 'I')
+        self.assertEqual(daily._fetched_units, 'M')
+
+
+if __name__ == '__main__':
+    unittest.main()
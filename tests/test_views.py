@@ -0,0 +1,57 @@
+import datetime
+import unittest
+
+from weatherbit.models import Forecast
+from tests.helpers import LOCATION, make_api
+
+START = datetime.datetime(2020, 1, 1, 12)
+
+
+class SeriesViewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.forecast = make_api().get_forecast(**LOCATION)
+        self.view = self.forecast.slice(START, START + datetime.timedelta(hours=3))
+        self.points = self.forecast.points[12:15]
+
+    def test_points(self):
+        self.assertEqual(len(self.view), 3)
+        self.assertEqual(self.view.points, self.points)
+        self.assertEqual(self.view.lat, self.forecast.lat)
+        self.assertEqual(self.view.units, 'M')
+
+    def test_derive(self):
+        self.assertEqual(self.view.derive('wind_u'), self.forecast.derive('wind_u')[12:15])
+        self.assertEqual(len(self.view.derive('heat_index')), 3)
+
+    def test_resample(self):
+        resampled = self.view.resample(datetime.timedelta(hours=6))
+        self.assertEqual(len(resampled.points), 1)
+        self.assertAlmostEqual(resampled.points[0].temp, sum(point.temp for point in self.points) / 3)
+        self.assertEqual(len(self.view.rolling(2, ['temp']).points), 3)
+
+    def test_to_bytes(self):
+        restored = Forecast.from_bytes(self.view.to_bytes())
+        self.assertEqual(restored.get(), self.view.get())
+        self.assertLess(len(self.view.to_bytes()), len(self.forecast.to_bytes()))
+
+    def test_lookups(self):
+        self.assertIs(self.view.at(START), self.points[0])
+        self.assertIsNone(self.view.at(START - datetime.timedelta(hours=1)))
+        self.assertIs(self.view.nearest(START - datetime.timedelta(hours=5)), self.points[0])
+        self.assertIs(self.view.nearest(START + datetime.timedelta(hours=20)), self.points[-1])
+        self.assertIsNone(self.view.interpolate(START + datetime.timedelta(hours=5), ['temp']))
+
+    def test_other_attributes(self):
+        for name in ['update', 'convert_units', 'json', 'response']:
+            with self.assertRaises(AttributeError):
+                getattr(self.view, name)
+
+    def test_follows_conversions(self):
+        self.view.derive('wind_chill')
+        self.forecast.convert_units('I')
+        self.assertEqual(self.view.units, 'I')
+        self.assertEqual(self.view.derive('wind_chill'), self.forecast.derive('wind_chill')[12:15])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,300 @@
+"""
+Local resampling, and rolling aggregation of TimeSeries responses.
+
+A single fine grained response (ie. hourly history) can serve every coarser
+view (ie. daily) without another API request. Each variable is aggregated
+according to its meaning:
+
+    - precipitation and snowfall are summed,
+    - maximum, and minimum variables keep the max, and min,
+    - wind direction is the vector mean, weighted by wind speed,
+    - other numeric variables are averaged,
+    - non-numeric variables (ie. weather) keep the most frequent value.
+
+Resampling to 'daily' uses local days (timestamp_local, or the timezone of
+the response), like the daily API endpoints. Variables are read column by
+column, and each aggregation is a single pass over a column.
+"""
+import math
+import datetime
+import itertools
+from collections import deque, Counter
+
+from weatherbit.utils import EPOCH, TIME_VARS, is_number, point_columns
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+AGGREGATIONS = {
+    'precip': 'sum',
+    'snow': 'sum',
+    'evapotranspiration': 'sum',
+    't_ghi': 'sum',
+    't_dni': 'sum',
+    't_dhi': 'sum',
+    't_solar_rad': 'sum',
+    'max_temp': 'max',
+    'high_temp': 'max',
+    'app_max_temp': 'max',
+    'max_wind_spd': 'max',
+    'wind_gust_spd': 'max',
+    'max_uv': 'max',
+    'max_ghi': 'max',
+    'max_dni': 'max',
+    'max_dhi': 'max',
+    'skin_temp_max': 'max',
+    'dlwrf_max': 'max',
+    'dswrf_max': 'max',
+    'min_temp': 'min',
+    'low_temp': 'min',
+    'app_min_temp': 'min',
+    'min_wind_spd': 'min',
+    'skin_temp_min': 'min',
+    'wind_dir': 'vector',
+    'max_wind_dir': 'vector',
+    'sunrise_ts': 'first',
+    'sunset_ts': 'first',
+    'moonrise_ts': 'first',
+    'moonset_ts': 'first',
+    'snow_depth': 'last',
+}
+
+# Daily extremes derived from a finer variable, when the response lacks them
+# and is resampled to daily (or coarser) buckets.
+DERIVED = {
+    'max_temp': ('temp', 'max'),
+    'min_temp': ('temp', 'min'),
+    'app_max_temp': ('app_temp', 'max'),
+    'app_min_temp': ('app_temp', 'min'),
+    'max_wind_spd': ('wind_spd', 'max'),
+    'max_uv': ('uv', 'max'),
+}
+
+
+def _aggregation(var, values, how):
+    if how and var in how:
+        return how[var]
+    if var in AGGREGATIONS:
+        return AGGREGATIONS[var]
+    if all(is_number(value) for value in values if value is not None):
+        return 'mean'
+    return 'mode'
+
+
+def _vector_mean(directions, speeds):
+    u = v = 0.0
+    for direction, speed in zip(directions, speeds):
+        if direction is None:
+            continue
+        weight = 1.0 if speed is None else speed
+        u += weight * math.sin(math.radians(direction))
+        v += weight * math.cos(math.radians(direction))
+    if u == 0.0 and v == 0.0:
+        return None
+    return round(math.degrees(math.atan2(u, v)) % 360)
+
+
+def _aggregate(method, values, speeds=None):
+    if method == 'vector':
+        return _vector_mean(values, speeds or [None] * len(values))
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    if method == 'sum':
+        return sum(values)
+    if method == 'mean':
+        return sum(values) / float(len(values))
+    if method == 'min':
+        return min(values)
+    if method == 'max':
+        return max(values)
+    if method == 'first':
+        return values[0]
+    if method == 'last':
+        return values[-1]
+    if method == 'mode':
+        counts = Counter(repr(value) for value in values)
+        best = counts.most_common(1)[0][0]
+        return next(value for value in values if repr(value) == best)
+    raise Exception("Unsupported aggregation '{}'.".format(method))
+
+
+def _local_time(series, point):
+    if point.timestamp_local is not None:
+        return point.timestamp_local
+    if series.timezone and ZoneInfo is not None:
+        utc = point.timestamp_utc.replace(tzinfo=datetime.timezone.utc)
+        return utc.astimezone(ZoneInfo(series.timezone)).replace(tzinfo=None)
+    return point.timestamp_utc
+
+
+def _bucket(granularity):
+    """
+    Returns a function mapping (utc, local) times to the (utc, local, datetime)
+    start of their bucket.
+    """
+    if granularity == 'daily':
+        def bucket(utc, local):
+            start = datetime.datetime(local.year, local.month, local.day)
+            return start - (local - utc), start, start
+        return bucket
+
+    if granularity == 'hourly':
+        granularity = datetime.timedelta(hours=1)
+    if not isinstance(granularity, datetime.timedelta):
+        raise Exception("Unsupported granularity. Use 'hourly', 'daily', or a datetime.timedelta.")
+
+    def bucket(utc, local):
+        start = EPOCH + ((utc - EPOCH) // granularity) * granularity
+        return start, start + (local - utc), start
+    return bucket
+
+
+def _daily_or_coarser(granularity):
+    return granularity == 'daily' or (isinstance(granularity, datetime.timedelta) and
+                                      granularity >= datetime.timedelta(days=1))
+
+
+def _new_series(series, points):
+    return series._from_points(series._response_meta(), [('points', points)], series._loader)
+
+
+def _new_point(series, state):
+    point_class = type(series.points[0])
+    point = point_class.__new__(point_class)
+    point.__dict__ = dict((key, value) for key, value in state.items() if value is not None)
+    return point
+
+
+def resample(series, granularity, how=None):
+    """
+    Aggregates a TimeSeries into 'hourly', 'daily' (local days), or
+    datetime.timedelta buckets. 'how' optionally maps variables to one of
+    'sum', 'mean', 'min', 'max', 'first', 'last', 'mode', or 'vector'.
+    Returns a new (lean) object of the same class.
+    """
+    points = [point for point in series.points if point.timestamp_utc is not None]
+    if not points:
+        return _new_series(series, [])
+
+    bucket = _bucket(granularity)
+    keys = [bucket(point.timestamp_utc, _local_time(series, point)) for point in points]
+    columns = point_columns(points)
+    for var, (source, method) in DERIVED.items():
+        if var not in columns and source in columns and _daily_or_coarser(granularity):
+            columns[var] = columns[source]
+            how = dict(how or {}, **{var: (how or {}).get(var, method)})
+
+    methods = dict((var, _aggregation(var, column, how)) for var, column in columns.items())
+    speeds = columns.get('wind_spd')
+
+    resampled = []
+    for key, group in itertools.groupby(range(len(points)), key=lambda i: keys[i]):
+        group = list(group)
+        lo, hi = group[0], group[-1] + 1
+        state = {'timestamp_utc': key[0], 'timestamp_local': key[1], 'datetime': key[2]}
+        for var, column in columns.items():
+            state[var] = _aggregate(methods[var], column[lo:hi], speeds[lo:hi] if speeds else None)
+        resampled.append(_new_point(series, state))
+
+    return _new_series(series, resampled)
+
+
+def rolling(series, window, api_vars=None, how=None):
+    """
+    Trailing rolling aggregation. 'window' is a datetime.timedelta (points
+    within (t - window, t]) or a number of points. Returns a new (lean)
+    object of the same class, with one point per input point.
+    """
+    if isinstance(window, datetime.timedelta):
+        if window <= datetime.timedelta(0):
+            raise ValueError('Rolling window must be a positive datetime.timedelta, got {}.'.format(window))
+    elif int(window) < 1:
+        raise ValueError('Rolling window must be at least one point, got {}.'.format(window))
+
+    points = [point for point in series.points if point.timestamp_utc is not None]
+    if not points:
+        return _new_series(series, [])
+
+    columns = point_columns(points, api_vars)
+    speeds = columns.get('wind_spd') or [getattr(point, 'wind_spd') for point in points]
+
+    # Window start index for each point.
+    starts = []
+    lo = 0
+    for i, point in enumerate(points):
+        if isinstance(window, datetime.timedelta):
+            while points[lo].timestamp_utc <= point.timestamp_utc - window:
+                lo += 1
+        else:
+            lo = max(0, i - int(window) + 1)
+        starts.append(lo)
+
+    rolled = dict((var, _rolling_column(_aggregation(var, column, how), column, speeds, starts))
+                  for var, column in columns.items())
+
+    result = []
+    for i, point in enumerate(points):
+        state = dict((var, getattr(point, var)) for var in TIME_VARS)
+        for var in rolled:
+            state[var] = rolled[var][i]
+        result.append(_new_point(series, state))
+    return _new_series(series, result)
+
+
+def _rolling_column(method, column, speeds, starts):
+    """
+    Single pass over a column for sum, mean, min, max, and vector windows.
+    """
+    out = []
+    if method in ('sum', 'mean', 'vector'):
+        total = count = u = v = 0.0
+        lo = 0
+        for i, value in enumerate(column):
+            if value is not None:
+                if method == 'vector':
+                    weight = 1.0 if speeds[i] is None else speeds[i]
+                    u += weight * math.sin(math.radians(value))
+                    v += weight * math.cos(math.radians(value))
+                else:
+                    total += value
+                count += 1
+            while lo < starts[i]:
+                if column[lo] is not None:
+                    if method == 'vector':
+                        weight = 1.0 if speeds[lo] is None else speeds[lo]
+                        u -= weight * math.sin(math.radians(column[lo]))
+                        v -= weight * math.cos(math.radians(column[lo]))
+                    else:
+                        total -= column[lo]
+                    count -= 1
+                lo += 1
+            if not count:
+                out.append(None)
+            elif method == 'sum':
+                out.append(total)
+            elif method == 'mean':
+                out.append(total / count)
+            elif abs(u) < 1e-9 and abs(v) < 1e-9:
+                out.append(None)
+            else:
+                out.append(round(math.degrees(math.atan2(u, v)) % 360))
+        return out
+
+    if method in ('min', 'max'):
+        # Monotonic deque of indexes, the window extreme is at the left.
+        better = (lambda a, b: a <= b) if method == 'min' else (lambda a, b: a >= b)
+        window = deque()
+        for i, value in enumerate(column):
+            if value is not None:
+                while window and better(value, column[window[-1]]):
+                    window.pop()
+                window.append(i)
+            while window and window[0] < starts[i]:
+                window.popleft()
+            out.append(column[window[0]] if window else None)
+        return out
+
+    return [_aggregate(method, column[starts[i]:i + 1]) for i in range(len(column))]
@@ -0,0 +1,150 @@
+"""
+Polls weather alerts for many regions, and reports only what changed.
+
+Each poll fetches the raw responses of the regions concurrently. A region
+whose response bytes are unchanged since the last poll is skipped after
+hashing them, before decoding, so the cost of a poll beyond the requests is
+proportional to the changed regions, not to the active alerts. Alerts are
+deduplicated by uri across overlapping regions.
+"""
+import time
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from weatherbit.models import Alert
+from weatherbit.transport import Response
+
+# kind is 'new', 'updated' or 'expired'. alert is the SingleTimePoint of the
+# alert, or None when expired. regions is the frozenset of regions reporting it.
+AlertEvent = namedtuple('AlertEvent', ['kind', 'uri', 'alert', 'regions'])
+
+# Fields that make an alert 'updated' when they change.
+FINGERPRINT_FIELDS = ['title', 'description', 'severity', 'effective_utc', 'expires_utc', 'onset_utc', 'ends_utc', 'regions']
+
+
+def _alert_key(alert):
+    return alert.uri or (alert.title, alert.effective_utc)
+
+
+def _fingerprint(alert):
+    values = [getattr(alert, field) for field in FINGERPRINT_FIELDS]
+    return hashlib.sha1(repr(values).encode('utf-8')).digest()
+
+
+class AlertWatcher(object):
+    def __init__(self, api, regions, threads=16):
+        """
+        'regions' is a dict of region names to get_alerts() arguments (ie.
+        {'raleigh': {'lat': 35.5, 'lon': -78.5}}), or a list of arguments.
+        """
+        if not isinstance(regions, dict):
+            regions = dict((tuple(sorted(region.items())), region) for region in regions)
+        self.api = api
+        self.regions = regions
+        self.threads = threads
+        self.errors = {}
+        # Region -> digest of the last response, and the alert keys it reported.
+        self._region_digests = {}
+        self._region_alerts = {}
+        # Alert key -> [fingerprint, set of regions].
+        self._alerts = {}
+
+    def active(self):
+        """
+        Returns the keys (uri) of the currently active alerts.
+        """
+        return list(self._alerts)
+
+    def poll(self):
+        """
+        Polls every region once. Returns the list of AlertEvents since the
+        last poll. Regions failing to load keep their previous state, and
+        their error is kept in self.errors.
+        """
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = dict((region, executor.submit(self._fetch, kwargs))
+                           for region, kwargs in self.regions.items())
+
+        events = {}
+        changed = []
+        for region, future in futures.items():
+            try:
+                raw = future.result()
+                digest = hashlib.sha1(raw[0]).digest()
+                if self._region_digests.get(region) == digest:
+                    self.errors.pop(region, None)
+                    continue
+                response = self._parse(self.regions[region], raw)
+            except Exception as e:
+                self.errors[region] = e
+                continue
+            self.errors.pop(region, None)
+
+            self._region_digests[region] = digest
+            changed.append((region, dict((_alert_key(alert), alert) for alert in response.points_alerts or [])))
+
+        # Additions first, so an alert moving between regions is not reported expired.
+        for region, current in changed:
+            self._add_alerts(region, current, events)
+        for region, current in changed:
+            self._remove_alerts(region, current, events)
+            self._region_alerts[region] = frozenset(current)
+
+        # The regions of each alert once every region is polled, copied so
+        # that events do not change with later polls.
+        return [event if event.kind == 'expired' else event._replace(regions=frozenset(self._alerts[key][1]))
+                for key, event in events.items()]
+
+    def watch(self, interval=300):
+        """
+        Generator polling every interval seconds, yielding AlertEvents.
+        """
+        while True:
+            started = time.time()
+            for event in self.poll():
+                yield event
+            time.sleep(max(0, interval - (time.time() - started)))
+
+    def _fetch(self, kwargs):
+        """
+        Requests the alerts of a region, same arguments as Api.get_alerts().
+        Returns the raw (content, url, headers) of the response.
+        """
+        kwargs = dict(kwargs)
+        timeout = kwargs.pop('timeout', None)
+        return self.api._fetch_raw(self.api.get_alerts_url(**self.api._prepare_query(kwargs)), timeout)
+
+    def _parse(self, kwargs, raw):
+        """
+        Builds the Alert object of a raw response, as Api.get_alerts() does.
+        """
+        content, url, headers = raw
+        response = Alert(self.api.json_loads(content), Response(url, 200, content, headers), headers,
+                         loader=self.api._refresh, lean=self.api.lean)
+        return self.api._finish_query(kwargs, response)
+
+    def _add_alerts(self, region, current, events):
+        for key, alert in current.items():
+            fingerprint = _fingerprint(alert)
+            state = self._alerts.get(key)
+            if state is None:
+                state = self._alerts[key] = [fingerprint, set([region])]
+                events[key] = AlertEvent('new', alert.uri, alert, None)
+                continue
+            state[1].add(region)
+            if state[0] != fingerprint:
+                state[0] = fingerprint
+                if key not in events:
+                    events[key] = AlertEvent('updated', alert.uri, alert, None)
+
+    def _remove_alerts(self, region, current, events):
+        for key in self._region_alerts.get(region, frozenset()).difference(current):
+            state = self._alerts.get(key)
+            if state is None:
+                continue
+            state[1].discard(region)
+            if not state[1]:
+                del self._alerts[key]
+                uri = None if isinstance(key, tuple) else key
+                events[key] = AlertEvent('expired', uri, None, frozenset())
@@ -1,17 +1,34 @@
-import requests
+import time
 import threading
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from weatherbit.models import Forecast, History, Current, Normals, Alert
-from weatherbit.utils import is_valid_day_format
+from weatherbit.utils import is_valid_day_format, get_json_loads
+from weatherbit.join import join_series
+from weatherbit.hedging import Hedger
+from weatherbit.transport import RequestsTransport, DeadlineExceeded
+from weatherbit.replay import RecordingTransport, ReplayTransport
+
+# Statuses worth another attempt within the deadline.
+RETRY_STATUSES = [429, 500, 502, 503, 504]
 
 class Api(object):
-    def __init__(self, key, granularity=None, history_granularity=None, https=True):
+    def __init__(self, key, granularity=None, history_granularity=None, https=True, json_backend=None, lean=False, resolver=None, canonical_units=None, timeout=None, retries=0, hedge=None, transport=None, cache=None):
         self.key = key
         self.version = 'v2.0'
         self.forecast_granularity = None
         self.history_granularity = None
         self.callback = None
         self.https = https
+        self.json_loads = get_json_loads(json_backend)
+        self.lean = lean
+        self.resolver = resolver
+        self.canonical_units = canonical_units
+        self.timeout = timeout
+        self.retries = retries
+        self.hedger = Hedger() if hedge is True else hedge or None
+        self.transport = transport or RequestsTransport()
+        self.cache = cache
 
         if granularity:
             self.forecast_granularity = granularity
@@ -383,6 +400,49 @@ class Api(object):
         self.https = https
         return
 
+    def set_json_backend(self, backend=None):
+        self.json_loads = get_json_loads(backend)
+
+    def set_resolver(self, resolver):
+        self.resolver = resolver
+
+    def set_canonical_units(self, units='M'):
+        self.canonical_units = units
+
+    def set_lean(self, lean=True):
+        self.lean = lean
+
+    def set_timeout(self, timeout, retries=None):
+        self.timeout = timeout
+        if retries is not None:
+            self.retries = retries
+
+    def set_hedge(self, hedge=True):
+        self.hedger = Hedger() if hedge is True else hedge or None
+
+    def set_transport(self, transport):
+        self.transport = transport
+
+    def set_cache(self, cache):
+        self.cache = cache
+
+    def record(self, path):
+        """
+            Records the requests, and responses of the current transport to
+            the archive at path (see weatherbit.replay). Returns the
+            RecordingTransport, close() it to finish the archive.
+        """
+        self.transport = RecordingTransport(path, self.transport)
+        return self.transport
+
+    def replay(self, path, latency='recorded', throughput=None, strict=False, seed=None):
+        """
+            Serves the requests from the archive at path, recorded with
+            record(), instead of the API. See weatherbit.replay.ReplayTransport.
+        """
+        self.transport = ReplayTransport(path, latency, throughput, strict, seed)
+        return self.transport
+
     def set_forecast_granularity(self, granularity):
         self.forecast_granularity = granularity
 
@@ -398,6 +458,9 @@ class Api(object):
         if kwargs is None:
             raise Exception('Arguments Required.')
 
+        timeout = kwargs.pop('timeout', None)
+        query, kwargs = kwargs, self._prepare_query(kwargs)
+
         if source == 'airquality':
             url = self.get_forecast_url_AQ(**kwargs)
         elif source == 'agweather':
@@ -407,36 +470,112 @@ class Api(object):
                 raise Exception("Time period has not been set. Please supply it via the 'tp' parameter.") 
             url = self.get_forecast_url(**kwargs)
 
-        forecast = self._make_request(url, self._parse_forecast)
+        forecast = self._finish_query(query, self._make_request(url, self._parse_forecast, timeout))
 
         return forecast
 
+    def get_joined(self, sources=None, kind='forecast', how='outer', api_vars=None, prefixes=None, **kwargs):
+        """
+            Fetches several sources (None for standard weather, 'airquality',
+            'agweather') concurrently, and joins them on timestamp_utc. kind
+            is 'forecast' or 'history'. Returns a dict of columns, see
+            weatherbit.join.join_series for the column names, and prefixes.
+        """
+        if sources is None:
+            sources = [None, 'airquality', 'agweather']
+        if not sources:
+            raise Exception('At least one source is required. Use None for standard weather.')
+
+        if kind == 'forecast':
+            fetch = self.get_forecast
+        elif kind == 'history':
+            fetch = self.get_history
+        else:
+            raise Exception("Unsupported kind. Use 'forecast' or 'history'.")
+
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            futures = [executor.submit(fetch, source, **kwargs) for source in sources]
+            series = [(source or 'weather', future.result()) for source, future in zip(sources, futures)]
+
+        return join_series(series, how, api_vars, prefixes)
+
     def get_current(self, source = None, **kwargs):
         
         if kwargs is None:
             raise Exception('Arguments Required.')
 
+        timeout = kwargs.pop('timeout', None)
+        query, kwargs = kwargs, self._prepare_query(kwargs)
+
         if source == 'airquality':
             url = self.get_current_url_AQ(**kwargs)
         else:
             url = self.get_current_url(**kwargs)
 
-        return self._make_request(url, self._parse_current)
+        return self._finish_query(query, self._make_request(url, self._parse_current, timeout))
 
     def get_alerts(self, source = None, **kwargs):
         
         if kwargs is None:
             raise Exception('Arguments Required.')
 
+        timeout = kwargs.pop('timeout', None)
+        query, kwargs = kwargs, self._prepare_query(kwargs)
+
         url = self.get_alerts_url(**kwargs)
 
-        return self._make_request(url, self._parse_alerts)
+        return self._finish_query(query, self._make_request(url, self._parse_alerts, timeout))
 
     def get_history(self, source = None, **kwargs):
         
         if kwargs is None:
             raise Exception('Arguments Required.')
 
+        timeout = kwargs.pop('timeout', None)
+        query, kwargs = kwargs, self._prepare_query(kwargs)
+
+        url = self._get_history_request_url(source, kwargs)
+
+        return self._finish_query(query, self._make_request(url, self._parse_history, timeout))
+
+    def get_history_bulk(self, locations, source = None, processes=None, threads=8, errors=None, **kwargs):
+        """
+            Fetches history for a list of locations (dicts of location
+            arguments, ie. [{'lat': 35.5, 'lon': -78.5}, ...]), sharing the
+            remaining arguments. Downloads run in a thread pool, while decoding
+            and parsing run in a pool of processes (see weatherbit.bulk).
+            Returns a list of lean History objects in the order of locations.
+            A location failing to download or parse does not stop the others,
+            it is None in the list, and its exception is stored by index in
+            errors when a dict is given.
+        """
+        # Shared memory requires Python 3.8+, imported only for bulk requests.
+        from weatherbit.bulk import parse_bulk
+
+        timeout = kwargs.pop('timeout', None)
+        queries = [dict(kwargs, **location) for location in locations]
+        urls = [self._get_history_request_url(source, self._prepare_query(query)) for query in queries]
+
+        def download(url):
+            try:
+                return self._fetch_raw(url, timeout), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            downloads = list(executor.map(download, urls))
+
+        failures = dict((i, error) for i, (_, error) in enumerate(downloads) if error is not None)
+        responses = [response for response, _ in downloads]
+        histories = parse_bulk(responses, History, self.json_loads, processes, loader=self._refresh, errors=failures)
+        if errors is not None:
+            errors.update(failures)
+
+        return [None if history is None else self._finish_query(query, history)
+                for query, history in zip(queries, histories)]
+
+    def _get_history_request_url(self, source, kwargs):
+
         if 'start_date' not in kwargs or 'end_date' not in kwargs:
             raise Exception('start_date, and end_date required.')
 
@@ -467,13 +606,16 @@ class Api(object):
         else:
             url = self.get_history_url(**kwargs)
 
-        return self._make_request(url, self._parse_history)
+        return url
 
     def get_normals(self, **kwargs):
         
         if kwargs is None:
             raise Exception('Arguments Required.')
 
+        timeout = kwargs.pop('timeout', None)
+        query, kwargs = kwargs, self._prepare_query(kwargs)
+
         if 'start_day' not in kwargs or 'end_day' not in kwargs:
             raise Exception('start_day, and end_day required.')
 
@@ -486,58 +628,157 @@ class Api(object):
 
         url = self.get_normals_url(**kwargs)
 
-        return self._make_request(url, self._parse_normals)
+        return self._finish_query(query, self._make_request(url, self._parse_normals, timeout))
 
-    def _parse_forecast(self, request_url):
-        weatherbitio_reponse = requests.get(request_url)
+    def _request(self, request_url, timeout=None, refresh=False):
+        """
+            Returns the response of the URL from the cache (ie. a
+            weatherbit.cache.SharedCache) when set, or requests it. With
+            refresh, the URL is requested, and a successful response
+            replaces the cached one. Waiting for another process to fetch
+            the URL counts against the deadline.
+        """
+        if self.cache is None:
+            return self._send(request_url, timeout)
+        if refresh:
+            weatherbitio_reponse = self._send(request_url, timeout)
+            if weatherbitio_reponse.status_code == 200:
+                self.cache.set(request_url, weatherbitio_reponse)
+            return weatherbitio_reponse
+
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.time() + timeout if timeout is not None else None
+
+        def send():
+            if deadline is None:
+                return self._send(request_url)
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+            return self._send(request_url, remaining)
+
+        return self.cache.fetch(request_url, send, timeout)
+
+    def _send(self, request_url, timeout=None):
+        """
+            Requests the URL with the transport within a deadline of timeout seconds (default:
+            the Api timeout), shared by up to self.retries retries of
+            connection errors, timeouts, and RETRY_STATUSES. Requests are
+            hedged when the Api has a Hedger. Returns the last response, or
+            raises weatherbit.transport.DeadlineExceeded past the deadline.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.time() + timeout if timeout is not None else None
+        attempt = 0
+        while True:
+            remaining = None if deadline is None else deadline - time.time()
+            try:
+                if self.hedger is not None:
+                    weatherbitio_reponse = self.hedger.call(lambda left: self.transport.get(request_url, timeout=left), remaining)
+                else:
+                    weatherbitio_reponse = self.transport.get(request_url, timeout=remaining)
+                if weatherbitio_reponse.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return weatherbitio_reponse
+            except self.transport.retry_exceptions:
+                if attempt >= self.retries:
+                    raise
+
+            # Exponential backoff, within the deadline.
+            backoff = 0.1 * 2 ** attempt
+            attempt += 1
+            if deadline is not None and time.time() + backoff >= deadline:
+                raise DeadlineExceeded('Request deadline of {}s exceeded after {} attempts.'.format(timeout, attempt))
+            time.sleep(backoff)
+
+    def _fetch(self, request_url, timeout=None, refresh=False):
+        """
+            Requests the URL, and decodes the response bytes once with the
+            configured JSON backend. Returns the decoded JSON and the response.
+        """
+        weatherbitio_reponse = self._request(request_url, timeout, refresh)
+        json = self.json_loads(weatherbitio_reponse.content)
         if weatherbitio_reponse.status_code != 200:
-            raise Exception(weatherbitio_reponse.json())
-        json = weatherbitio_reponse.json()
-        headers = weatherbitio_reponse.headers
+            raise Exception(json)
 
-        return Forecast(json, weatherbitio_reponse, headers)
+        return json, weatherbitio_reponse
 
-    def _parse_history(self, request_url):
-        weatherbitio_reponse = requests.get(request_url)
+    def _refresh(self, request_url, timeout=None):
+        """
+            The loader of response objects: same as _fetch(), bypassing the
+            cache, so update() gets fresh data.
+        """
+        return self._fetch(request_url, timeout, refresh=True)
+
+    def _fetch_raw(self, request_url, timeout=None):
+        """
+            Requests the URL, returning the undecoded response bytes, the
+            URL, and the headers.
+        """
+        weatherbitio_reponse = self._request(request_url, timeout)
         if weatherbitio_reponse.status_code != 200:
-            raise Exception(weatherbitio_reponse.json())
-        json = weatherbitio_reponse.json()
+            raise Exception(self.json_loads(weatherbitio_reponse.content))
+
+        return weatherbitio_reponse.content, weatherbitio_reponse.url, weatherbitio_reponse.headers
+
+    def _parse_forecast(self, request_url, timeout=None):
+        json, weatherbitio_reponse = self._fetch(request_url, timeout)
         headers = weatherbitio_reponse.headers
 
-        return History(json, weatherbitio_reponse, headers)
+        return Forecast(json, weatherbitio_reponse, headers, loader=self._refresh, lean=self.lean)
 
-    def _parse_normals(self, request_url):
-        weatherbitio_reponse = requests.get(request_url)
-        if weatherbitio_reponse.status_code != 200:
-            raise Exception(weatherbitio_reponse.json())
-        json = weatherbitio_reponse.json()
+    def _parse_history(self, request_url, timeout=None):
+        json, weatherbitio_reponse = self._fetch(request_url, timeout)
         headers = weatherbitio_reponse.headers
 
-        return Normals(json, weatherbitio_reponse, headers)
+        return History(json, weatherbitio_reponse, headers, loader=self._refresh, lean=self.lean)
 
-    def _parse_current(self, request_url):
-        weatherbitio_reponse = requests.get(request_url)
-        if weatherbitio_reponse.status_code != 200:
-            raise Exception(weatherbitio_reponse.json())
-        json = weatherbitio_reponse.json()
+    def _parse_normals(self, request_url, timeout=None):
+        json, weatherbitio_reponse = self._fetch(request_url, timeout)
         headers = weatherbitio_reponse.headers
 
-        return Current(json, weatherbitio_reponse, headers)
+        return Normals(json, weatherbitio_reponse, headers, loader=self._refresh, lean=self.lean)
 
-    def _parse_alerts(self, request_url):
-        weatherbitio_reponse = requests.get(request_url)
-        if weatherbitio_reponse.status_code != 200:
-            raise Exception(weatherbitio_reponse.json())
-        json = weatherbitio_reponse.json()
+    def _parse_current(self, request_url, timeout=None):
+        json, weatherbitio_reponse = self._fetch(request_url, timeout)
         headers = weatherbitio_reponse.headers
 
-        return Alert(json, weatherbitio_reponse, headers)
+        return Current(json, weatherbitio_reponse, headers, loader=self._refresh, lean=self.lean)
+
+    def _parse_alerts(self, request_url, timeout=None):
+        json, weatherbitio_reponse = self._fetch(request_url, timeout)
+        headers = weatherbitio_reponse.headers
+
+        return Alert(json, weatherbitio_reponse, headers, loader=self._refresh, lean=self.lean)
+
+    def _prepare_query(self, kwargs):
+        """
+            Rewrites the query arguments before building the URL: known
+            locations become coordinates, and units the canonical units.
+        """
+        if self.resolver is not None:
+            kwargs = self.resolver.rewrite(kwargs)
+        if self.canonical_units is not None:
+            kwargs = dict(kwargs, units=self.canonical_units)
+        return kwargs
+
+    def _finish_query(self, kwargs, response):
+        """
+            Learns the location of the query, and converts the response
+            to the requested units.
+        """
+        if self.resolver is not None:
+            self.resolver.learn(kwargs, response)
+        if self.canonical_units is not None:
+            response.convert_units(kwargs.get('units', 'M'), self.canonical_units)
+        return response
 
-    def _make_request(self, request_url, callback=None):
+    def _make_request(self, request_url, callback=None, timeout=None):
         """
             This function is used by load_forecast OR by users to manually
             construct the URL for an API call.
         """
+        if timeout is not None:
+            return callback(request_url, timeout)
         return callback(request_url)
 
     def __load_async(self, url, callback):
@@ -0,0 +1,272 @@
+"""
+Local, memory-mapped columnar archive of History responses.
+
+Each location is a directory holding one append-only file per variable,
+next to a sorted timestamp_utc column:
+
+    <root>/<location>/meta.json          location metadata, units, and column types
+    <root>/<location>/timestamp_utc.col  int64 microseconds since the epoch
+    <root>/<location>/<var>.col          one value per timestamp
+    <root>/<location>/strings.jsonl      interned non-numeric values
+
+Column types are 'd' (float64, NaN for None), 't' (datetimes as int64
+microseconds, INT64_MIN for None), and 'o' (int32 index into strings.jsonl,
+-1 for None), used for strings and the 'weather' dicts. 'd' columns that
+only ever held ints are listed in meta.json, and read back as ints. Files
+use the byte order of the host that created the archive.
+
+Reads bisect the memory-mapped timestamp column, and only touch the pages of
+the requested range, so a range query costs O(range) I/O whatever the size
+of the archive. The archive assumes a single writer.
+"""
+import os
+import sys
+import json
+import mmap
+import math
+import array
+import bisect
+import datetime
+
+from weatherbit.models import History, Point
+from weatherbit.utils import to_micros, from_micros, is_number
+
+INT64_MIN = -(1 << 63)
+
+# Column type -> array typecode.
+COLUMN_TYPECODES = {'d': 'd', 't': 'q', 'o': 'i'}
+META_FIELDS = ['city_name', 'lat', 'lon', 'country_code', 'state_code', 'timezone']
+
+
+def _column_type(value):
+    if isinstance(value, datetime.datetime):
+        return 't'
+    if is_number(value):
+        return 'd'
+    return 'o'
+
+
+class _MappedColumn(object):
+    """
+    Read-only, memory-mapped view of a column file.
+    """
+    def __init__(self, path, typecode):
+        self.values = memoryview(b'').cast(typecode)
+        self._map = None
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.values = memoryview(self._map).cast(typecode)
+
+    def close(self):
+        self.values.release()
+        if self._map is not None:
+            self._map.close()
+
+
+class HistoryArchive(object):
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def locations(self):
+        return sorted(name for name in os.listdir(self.path)
+                      if os.path.isfile(os.path.join(self.path, name, 'meta.json')))
+
+    def location_key(self, response):
+        return '{}_{}'.format(response.lat, response.lon)
+
+    def _location_path(self, location, *parts):
+        return os.path.join(self.path, location, *parts)
+
+    def _load_meta(self, location):
+        path = self._location_path(location, 'meta.json')
+        if not os.path.isfile(path):
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        if meta['byteorder'] != sys.byteorder:
+            raise Exception('Archive was written with {} byte order.'.format(meta['byteorder']))
+        return meta
+
+    def _save_meta(self, location, meta):
+        path = self._location_path(location, 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def _load_strings(self, location):
+        path = self._location_path(location, 'strings.jsonl')
+        if not os.path.isfile(path):
+            return []
+        with open(path) as f:
+            return [line.rstrip('\n') for line in f]
+
+    def _append_column(self, location, field, column_type, values, mode='ab'):
+        packed = array.array(COLUMN_TYPECODES[column_type], values)
+        with open(self._location_path(location, field + '.col'), mode) as f:
+            f.write(packed.tobytes())
+
+    def append(self, history, location=None):
+        """
+        Appends the points of a History newer than the last archived
+        timestamp. Returns the number of points appended.
+        """
+        location = location or self.location_key(history)
+        if not os.path.isdir(self._location_path(location)):
+            os.makedirs(self._location_path(location))
+
+        meta = self._load_meta(location) or {'byteorder': sys.byteorder, 'count': 0, 'last': None, 'columns': {},
+                                             'int_columns': []}
+        if None not in (meta.get('units'), history.units) and meta['units'] != history.units:
+            raise Exception("History in units '{}' can not be appended to an archive in units '{}'.".format(
+                history.units, meta['units']))
+        meta['units'] = meta.get('units') or history.units
+        if any(point.timestamp_utc is None for point in history.points):
+            raise Exception('Points without timestamp_utc can not be archived.')
+        points = history.points
+        if meta['last'] is not None:
+            points = [point for point in points if to_micros(point.timestamp_utc) > meta['last']]
+        if not points:
+            return 0
+        timestamps = [to_micros(point.timestamp_utc) for point in points]
+        if timestamps != sorted(timestamps):
+            raise Exception('Points must be sorted by timestamp_utc.')
+
+        self._truncate(location, meta)
+
+        # New variables are backfilled with None.
+        columns = meta['columns']
+        int_columns = set(meta.get('int_columns', []))
+        for point in points:
+            for field, value in vars(point).items():
+                if field != 'timestamp_utc' and field not in columns and value is not None:
+                    columns[field] = _column_type(value)
+                    if columns[field] == 'd':
+                        int_columns.add(field)
+                    backfill = self._encode(columns[field], [None] * meta['count'], None)
+                    self._append_column(location, field, columns[field], backfill, mode='wb')
+
+        strings = self._load_strings(location)
+        string_index = dict((value, i) for i, value in enumerate(strings))
+        new_strings = []
+
+        def intern(value):
+            encoded = json.dumps(value, sort_keys=True)
+            if encoded not in string_index:
+                string_index[encoded] = len(strings) + len(new_strings)
+                new_strings.append(encoded)
+            return string_index[encoded]
+
+        for field, column_type in columns.items():
+            values = [getattr(point, field) for point in points]
+            if field in int_columns and not all(type(value) is int for value in values if value is not None):
+                int_columns.discard(field)
+            self._append_column(location, field, column_type, self._encode(column_type, values, intern, field))
+
+        if new_strings:
+            with open(self._location_path(location, 'strings.jsonl'), 'a') as f:
+                f.write(''.join(value + '\n' for value in new_strings))
+
+        self._append_column(location, 'timestamp_utc', 't', timestamps)
+
+        for field in META_FIELDS:
+            meta[field] = getattr(history, field, None)
+        meta['int_columns'] = sorted(int_columns)
+        meta['count'] += len(points)
+        meta['last'] = timestamps[-1]
+        self._save_meta(location, meta)
+        return len(points)
+
+    def _truncate(self, location, meta):
+        """
+        Drops values written past meta['count'] by an interrupted append.
+        """
+        columns = dict(meta['columns'], timestamp_utc='t')
+        for field, column_type in columns.items():
+            path = self._location_path(location, field + '.col')
+            size = meta['count'] * array.array(COLUMN_TYPECODES[column_type]).itemsize
+            if os.path.isfile(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def _encode(self, column_type, values, intern, field=None):
+        if column_type == 'd':
+            try:
+                return [math.nan if value is None else float(value) for value in values]
+            except (TypeError, ValueError):
+                raise Exception("Variable '{}' is not numeric in every point.".format(field))
+        if column_type == 't':
+            return [INT64_MIN if value is None else to_micros(value) for value in values]
+        return [-1 if value is None else intern(value) for value in values]
+
+    def time_range(self, location):
+        """
+        Returns the first, and last archived timestamp_utc of a location.
+        """
+        meta = self._load_meta(location)
+        if meta is None or not meta['count']:
+            return None, None
+        column = _MappedColumn(self._location_path(location, 'timestamp_utc.col'), 'q')
+        try:
+            first = from_micros(column.values[0])
+        finally:
+            column.close()
+        return first, from_micros(meta['last'])
+
+    def read(self, location, start=None, end=None, api_vars=None, response_class=History):
+        """
+        Returns a lean History with the archived points where
+        start <= timestamp_utc < end. start and end are datetimes (UTC), and
+        either may be None. Only the variables in api_vars are read when given.
+        """
+        meta = self._load_meta(location)
+        if meta is None:
+            raise Exception("Location '{}' is not archived.".format(location))
+
+        timestamps = _MappedColumn(self._location_path(location, 'timestamp_utc.col'), 'q')
+        try:
+            values = timestamps.values
+            lo = 0 if start is None else bisect.bisect_left(values, to_micros(start), 0, meta['count'])
+            hi = meta['count'] if end is None else bisect.bisect_left(values, to_micros(end), 0, meta['count'])
+            hi = max(lo, hi)
+            states = [{'timestamp_utc': from_micros(value)} for value in values[lo:hi]]
+        finally:
+            timestamps.close()
+
+        strings = None
+        decoded = {}
+        int_columns = set(meta.get('int_columns', []))
+        for field, column_type in meta['columns'].items():
+            if api_vars is not None and field not in api_vars:
+                continue
+            column = _MappedColumn(self._location_path(location, field + '.col'), COLUMN_TYPECODES[column_type])
+            try:
+                column_values = column.values[lo:hi].tolist()
+            finally:
+                column.close()
+
+            if column_type == 'o' and strings is None:
+                strings = self._load_strings(location)
+            is_int = field in int_columns
+            for state, value in zip(states, column_values):
+                if column_type == 'd':
+                    if value == value:
+                        state[field] = int(value) if is_int else value
+                elif column_type == 't':
+                    if value != INT64_MIN:
+                        state[field] = from_micros(value)
+                elif value >= 0:
+                    if value not in decoded:
+                        decoded[value] = json.loads(strings[value])
+                    state[field] = decoded[value]
+
+        points = []
+        for state in states:
+            point = Point.__new__(Point)
+            point.__dict__ = state
+            points.append(point)
+
+        response_meta = dict((field, meta.get(field)) for field in META_FIELDS)
+        response_meta['units'] = meta.get('units')
+        return response_class._from_points(response_meta, [('points', points)])
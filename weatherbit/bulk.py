@@ -0,0 +1,104 @@
+"""
+Bulk parsing of raw API responses in a process pool.
+
+Decoding, and building the points of large responses is CPU bound. Workers
+decode the raw response bytes, build the response object, and hand it back
+in the compact binary layout (see weatherbit.serialization) through a
+shared memory block, so only the block name crosses the process boundary.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+
+from weatherbit.models import Forecast, History, Normals, Current, Alert
+from weatherbit.utils import get_json_loads
+
+RESPONSE_CLASSES = {'Forecast': Forecast, 'History': History, 'Normals': Normals, 'Current': Current, 'Alert': Alert}
+
+
+def _parse_to_shared_memory(job):
+    class_name, json_loads, content, url, headers = job
+    response = RESPONSE_CLASSES[class_name](json_loads(content), None, headers, lean=True)
+    response._set_url(url)
+    data = response.to_bytes()
+
+    try:
+        # The parent process unlinks the block, so this worker's resource
+        # tracker must not remove it when the worker exits (Python 3.13+).
+        block = shared_memory.SharedMemory(create=True, size=len(data), track=False)
+    except TypeError:
+        block = shared_memory.SharedMemory(create=True, size=len(data))
+        # Before track=False, the block is registered with the tracker under
+        # its private _name (the name with the leading '/' on POSIX, which the
+        # public name strips), and only unregistering that name stops it.
+        resource_tracker.unregister(block._name, 'shared_memory')
+    block.buf[:len(data)] = data
+    block.close()
+    return block.name, len(data)
+
+
+def _load_from_shared_memory(response_class, name, size, loader):
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        buf = block.buf[:size]
+        try:
+            return response_class.from_bytes(buf, loader=loader)
+        finally:
+            buf.release()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _unlink(name):
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def parse_bulk(responses, response_class=History, json_loads=None, processes=None, loader=None, errors=None):
+    """
+    Parses raw responses in a process pool. 'responses' is a list of
+    (content, url, headers) tuples, where content is the raw response bytes,
+    or None. Returns lean response objects in the same order, None for None.
+    When errors is a dict, responses failing to parse are None too, and
+    their exceptions are stored in errors by index, otherwise the first
+    failure is raised.
+    """
+    if json_loads is None:
+        json_loads = get_json_loads()
+
+    jobs = [None if response is None else (response_class.__name__, json_loads, response[0], response[1], dict(response[2] or {}))
+            for response in responses]
+    count = len([job for job in jobs if job is not None])
+    if not count:
+        return [None] * len(jobs)
+
+    processes = min(processes or os.cpu_count() or 1, count)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [None if job is None else executor.submit(_parse_to_shared_memory, job) for job in jobs]
+
+    results = []
+    try:
+        for i, future in enumerate(futures):
+            if future is None:
+                results.append(None)
+                continue
+            try:
+                name, size = future.result()
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors[i] = e
+                results.append(None)
+                continue
+            results.append(_load_from_shared_memory(response_class, name, size, loader))
+    finally:
+        # Don't leak the blocks of the results left after an error.
+        for future in futures[len(results):]:
+            if future is not None and future.exception() is None:
+                _unlink(future.result()[0])
+    return results
@@ -0,0 +1,199 @@
+"""
+Response cache shared by the processes of a host (ie. the workers of a web
+server), stored in a local directory.
+
+Each response is a file named by the hash of its normalized URL (see
+weatherbit.replay.normalize_url), holding its expiry time, status, headers,
+and zlib compressed payload. Files are replaced atomically, and read through
+mmap. On a miss, one process fetches the URL while the others wait on a per
+URL lock file (fcntl.flock, polled within the deadline of the request), and
+then read the response it stored, so any worker's fetch warms all the others.
+"""
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from weatherbit.replay import normalize_url
+from weatherbit.transport import Response, DeadlineExceeded
+
+# Expiry time, and metadata length.
+ENTRY_HEADER = struct.Struct('<dI')
+
+# Age (seconds) of the temporary files left by interrupted writes deleted by purge().
+STALE_TEMPORARY = 3600
+
+# Longest sleep (seconds) between two attempts to take a lock.
+LOCK_POLL = 0.05
+
+
+class SharedCache(object):
+    def __init__(self, path, ttl=600):
+        """
+        Keeps successful responses in the directory at path for ttl seconds.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _file(self, url):
+        digest = hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest[:2], digest)
+
+    def get(self, url):
+        """
+        Returns the cached response of url, or None when missing or expired.
+        """
+        try:
+            with open(self._file(url), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    expires, meta_size = ENTRY_HEADER.unpack_from(data)
+                    if expires < time.time():
+                        return None
+                    start = ENTRY_HEADER.size
+                    meta = json.loads(data[start:start + meta_size].decode('utf-8'))
+                    content = zlib.decompress(data[start + meta_size:])
+        except (IOError, OSError, ValueError, struct.error, zlib.error):
+            return None
+        return Response(url, meta['status_code'], content, meta['headers'])
+
+    def set(self, url, response, ttl=None):
+        """
+        Stores a response (url, status_code, content, and headers attributes).
+        """
+        filename = self._file(url)
+        directory = os.path.dirname(filename)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created by another process.
+                pass
+        meta = json.dumps({'status_code': response.status_code, 'headers': dict(response.headers or {})}).encode('utf-8')
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        temporary = '{}.{}.{}.tmp'.format(filename, os.getpid(), threading.current_thread().ident)
+        with open(temporary, 'wb') as f:
+            f.write(ENTRY_HEADER.pack(expires, len(meta)))
+            f.write(meta)
+            f.write(zlib.compress(response.content))
+        os.replace(temporary, filename)
+
+    def fetch(self, url, request, timeout=None):
+        """
+        Returns the cached response of url, or calls request() once across
+        processes, and caches its response when successful. Raises
+        DeadlineExceeded when another process holds the URL for more than
+        timeout seconds.
+        """
+        response = self.get(url)
+        if response is None:
+            lock = self._lock(url, timeout)
+            try:
+                # Another process may have stored it while we waited.
+                response = self.get(url)
+                if response is None:
+                    response = request()
+                    if response.status_code == 200:
+                        self.set(url, response)
+                    self._count('misses')
+                    return response
+            finally:
+                self._unlock(lock)
+        self._count('hits')
+        return response
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _lock(self, url, timeout=None):
+        if fcntl is None:
+            return None
+        filename = self._file(url) + '.lock'
+        directory = os.path.dirname(filename)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                pass
+        deadline = None if timeout is None else time.time() + timeout
+        delay = 0.001
+        lock = open(filename, 'a')
+        while True:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock
+            except (IOError, OSError):
+                pass
+            if deadline is not None and time.time() + delay > deadline:
+                lock.close()
+                raise DeadlineExceeded('Request deadline of {}s exceeded waiting for {}.'.format(timeout, normalize_url(url)))
+            time.sleep(delay)
+            delay = min(delay * 2, LOCK_POLL)
+
+    def _unlock(self, lock):
+        if lock is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            lock.close()
+
+    def purge(self):
+        """
+        Deletes the expired responses, their lock files, and the temporary
+        files of interrupted writes. Returns the number of responses deleted.
+        """
+        deleted = 0
+        now = time.time()
+        for directory, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                if filename.endswith('.lock') or filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    with open(path, 'rb') as f:
+                        expires, _ = ENTRY_HEADER.unpack(f.read(ENTRY_HEADER.size))
+                    if expires < now:
+                        os.remove(path)
+                        deleted += 1
+                except (IOError, OSError, struct.error):
+                    continue
+
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    if filename.endswith('.tmp') and os.path.getmtime(path) < now - STALE_TEMPORARY:
+                        os.remove(path)
+                    elif filename.endswith('.lock') and not os.path.exists(path[:-len('.lock')]):
+                        self._remove_lock(path)
+                except (IOError, OSError):
+                    continue
+        return deleted
+
+    def _remove_lock(self, path):
+        """
+        Deletes a lock file, unless a process holds it (ie. fetching its URL).
+        A process that opened it just before may still lock the deleted
+        file, at worst the URL is then fetched twice.
+        """
+        if fcntl is None:
+            os.remove(path)
+            return
+        with open(path, 'a') as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                return
+            os.remove(path)
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,342 @@
+"""
+The weatherbit command: fetches forecasts, history, or current conditions for
+a list of locations, and writes the points as NDJSON (or Parquet).
+
+    weatherbit history --locations stations.csv --output history.ndjson \\
+        --tp hourly --start-date 2020-01-01 --end-date 2020-01-02 \\
+        --parallelism 16 --rate-limit 20
+
+Locations are read lazily from a CSV file with a header, or an NDJSON file,
+one location per row (ie. lat,lon or city,country). Jobs run in a thread
+pool, with a bounded number of jobs in flight. Output rows are written as
+jobs complete, and each completed location is recorded in a checkpoint file
+once its rows are written, so an interrupted run started again with the same
+arguments skips the completed locations.
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from weatherbit.api import Api
+from weatherbit.utils import RateLimiter
+
+COMMANDS = ['forecast', 'history', 'current']
+
+# Bytes read at a time when looking for the last complete line of an output.
+TAIL_CHUNK = 65536
+
+
+def read_locations(path):
+    """
+    Yields the locations of a CSV (with a header) or NDJSON file as dicts.
+    """
+    with open(path) as f:
+        if path.endswith('.ndjson') or path.endswith('.jsonl') or path.endswith('.json'):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield dict((name, value) for name, value in row.items() if value not in (None, ''))
+
+
+def location_key(location):
+    """
+    The checkpoint key of a location: its 'id' when given, or its arguments.
+    """
+    if 'id' in location:
+        return str(location['id'])
+    return json.dumps(location, sort_keys=True)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+class NDJSONWriter(object):
+    def __init__(self, path):
+        """
+        Appends to path, after dropping a partial last line left by an interrupted run.
+        """
+        self._file = open(path, 'ab+')
+        self._drop_partial_line()
+
+    def _drop_partial_line(self):
+        end = self._file.seek(0, os.SEEK_END)
+        if not end:
+            return
+        self._file.seek(end - 1)
+        if self._file.read(1) == b'\n':
+            return
+        # Rows may be longer than a chunk, read back until a newline.
+        while end > 0:
+            start = max(0, end - TAIL_CHUNK)
+            self._file.seek(start)
+            newline = self._file.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                self._file.truncate(start + newline + 1)
+                return
+            end = start
+        self._file.truncate(0)
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, default=_json_default).encode('utf-8'))
+            self._file.write(b'\n')
+
+    def flush(self):
+        """
+        Returns True once the written rows are on disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(object):
+    def __init__(self, path, batch_size=50000):
+        """
+        Writes batches of batch_size rows as complete Parquet files:
+        output.parquet, then output.1.parquet, output.2.parquet... so the
+        rows of checkpointed locations stay readable after an interruption.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise Exception('Parquet output requires pyarrow. Install it, or use an .ndjson output.')
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._root, self._ext = os.path.splitext(path)
+        self._part = 0
+        self.batch_size = batch_size
+        self._rows = []
+
+    def _next_path(self):
+        while True:
+            if self._part:
+                path = '{}.{}{}'.format(self._root, self._part, self._ext)
+            else:
+                path = self._root + self._ext
+            self._part += 1
+            if not os.path.exists(path):
+                return path
+
+    def write(self, rows):
+        self._rows.extend(rows)
+
+    def flush(self, force=False):
+        """
+        Writes a part file when batch_size rows are buffered (or force).
+        Returns True once every written row is on disk.
+        """
+        if not self._rows:
+            return True
+        if not force and len(self._rows) < self.batch_size:
+            return False
+        path = self._next_path()
+        with open(path + '.tmp', 'wb') as f:
+            self._pq.write_table(self._pa.Table.from_pylist(self._rows), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        self._rows = []
+        return True
+
+    def close(self):
+        self.flush(force=True)
+
+
+class Checkpoint(object):
+    def __init__(self, path):
+        """
+        Append-only file of completed location keys, one JSON string per line.
+        """
+        self.path = path
+        self.completed = set()
+        if os.path.isfile(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self.completed.add(json.loads(line))
+                    except ValueError:
+                        # Blank, or a partial line of an interrupted run.
+                        continue
+        self._file = open(path, 'a')
+        self._pending = []
+
+    def add(self, key):
+        """
+        Marks key completed at the next commit().
+        """
+        self._pending.append(key)
+
+    def commit(self):
+        for key in self._pending:
+            self._file.write(json.dumps(key))
+            self._file.write('\n')
+            self.completed.add(key)
+        self._pending = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def _query(args):
+    if args.command in ['forecast', 'history'] and not args.source and not args.tp:
+        raise Exception('{} requires --tp.'.format(args.command))
+    query = {}
+    if args.tp:
+        query['tp'] = args.tp
+    if args.units:
+        query['units'] = args.units
+    if args.command == 'history':
+        if not args.start_date or not args.end_date:
+            raise Exception('history requires --start-date, and --end-date.')
+        query['start_date'] = args.start_date
+        query['end_date'] = args.end_date
+    for param in args.param or []:
+        name, _, value = param.partition('=')
+        query[name] = value
+    return query
+
+
+def run_job(api, command, source, query, api_vars, location, limiter):
+    """
+    Fetches one location, and returns its output rows: the location arguments
+    updated with each point.
+    """
+    limiter.wait()
+    kwargs = dict(query, **dict((name, value) for name, value in location.items() if name != 'id'))
+    if command == 'forecast':
+        response = api.get_forecast(source, **kwargs)
+    elif command == 'history':
+        response = api.get_history(source, **kwargs)
+    else:
+        response = api.get_current(source, **kwargs)
+
+    rows = []
+    if response.points:
+        for point in response.get(api_vars):
+            row = dict(location)
+            row.update(point)
+            rows.append(row)
+    return rows
+
+
+def run(api, args, locations, writer, checkpoint, out=sys.stderr):
+    """
+    Runs the jobs of locations not in the checkpoint. Returns the number of
+    completed, skipped, and failed locations. The caller closes the writer,
+    and the checkpoint (see finish()).
+    """
+    query = _query(args)
+    api_vars = args.vars.split(',') if args.vars else None
+    limiter = RateLimiter(args.rate_limit)
+    max_in_flight = args.parallelism * 4
+    completed = skipped = failed = 0
+
+    def collect(done, in_flight):
+        nonlocal completed, failed
+        for future in done:
+            key = in_flight.pop(future)
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed += 1
+                out.write('weatherbit: {} failed: {}\n'.format(key, e))
+                continue
+            writer.write(rows)
+            checkpoint.add(key)
+            completed += 1
+        # Keys are checkpointed only once their rows are on disk.
+        if writer.flush():
+            checkpoint.commit()
+
+    with ThreadPoolExecutor(max_workers=args.parallelism) as executor:
+        in_flight = {}
+        for location in locations:
+            key = location_key(location)
+            if key in checkpoint.completed:
+                skipped += 1
+                continue
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done, in_flight)
+            in_flight[executor.submit(run_job, api, args.command, args.source, query, api_vars, location, limiter)] = key
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done, in_flight)
+
+    return completed, skipped, failed
+
+
+def finish(writer, checkpoint):
+    """
+    Closes the output, then checkpoints the locations whose rows it holds,
+    and closes the checkpoint.
+    """
+    try:
+        writer.close()
+        checkpoint.commit()
+    finally:
+        checkpoint.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='weatherbit', description='Bulk Weatherbit.io API ingestion.')
+    parser.add_argument('command', choices=COMMANDS)
+    parser.add_argument('--locations', required=True, help='CSV (with a header), or NDJSON file of locations.')
+    parser.add_argument('--output', required=True, help='Output .ndjson, or .parquet file (requires pyarrow).')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint).')
+    parser.add_argument('--key', default=os.environ.get('WEATHERBIT_API_KEY'), help='API key (default: $WEATHERBIT_API_KEY).')
+    parser.add_argument('--source', help="'airquality', or 'agweather' (default: standard weather).")
+    parser.add_argument('--tp', help="Time period (ie. 'hourly', 'daily'), required for standard weather forecast, and history.")
+    parser.add_argument('--units', help="'M', 'I', or 'S'.")
+    parser.add_argument('--start-date', help='History start date (YYYY-MM-DD).')
+    parser.add_argument('--end-date', help='History end date (YYYY-MM-DD).')
+    parser.add_argument('--vars', help='Comma separated variables to output (default: all).')
+    parser.add_argument('--param', action='append', help='Extra query argument as name=value (repeatable).')
+    parser.add_argument('--parallelism', type=int, default=8, help='Concurrent requests (default: 8).')
+    parser.add_argument('--rate-limit', type=float, help='Maximum requests per second (default: unlimited).')
+    parser.add_argument('--json-backend', help="JSON decoder (ie. 'orjson', default: fastest available).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.key:
+        sys.stderr.write('weatherbit: an API key is required (--key, or $WEATHERBIT_API_KEY).\n')
+        return 2
+
+    api = Api(args.key, granularity=args.tp, history_granularity=args.tp, json_backend=args.json_backend, lean=True)
+    if args.output.endswith('.parquet'):
+        writer = ParquetWriter(args.output)
+    else:
+        writer = NDJSONWriter(args.output)
+    checkpoint = Checkpoint(args.checkpoint or args.output + '.checkpoint')
+
+    try:
+        completed, skipped, failed = run(api, args, read_locations(args.locations), writer, checkpoint)
+    finally:
+        # Also when run() raised: keep the rows written so far, and the
+        # locations checkpointed with them.
+        finish(writer, checkpoint)
+    sys.stderr.write('weatherbit: {} completed, {} skipped, {} failed.\n'.format(completed, skipped, failed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Derived variables computed over a whole response: heat index, wind chill,
+growing, heating and cooling degree days, wind vector components, and
+reference evapotranspiration.
+
+Each function reads the columns it needs once, and returns one value per
+point (None where an input is missing, or not a field of the points, ie.
+max_temp of current conditions), in the units of the response
+(metric when unknown). Use the derive() method of a response, which caches
+the results.
+"""
+import math
+import datetime
+
+from weatherbit.units import converter
+
+
+def _column(series, var):
+    return [getattr(point, var, None) for point in series.points]
+
+
+def _units(series):
+    return series.units or 'M'
+
+
+def _temperature(series, var):
+    """
+    Returns a column of temperatures in Celsius.
+    """
+    to_celsius = converter('temperature', _units(series), 'M')
+    return [None if value is None else to_celsius(value) for value in _column(series, var)]
+
+
+def _daily_temperatures(series):
+    """
+    Returns the (max, min, mean) Celsius columns, from max_temp/min_temp, or temp.
+    """
+    highs = _temperature(series, 'max_temp')
+    lows = _temperature(series, 'min_temp')
+    temps = _temperature(series, 'temp')
+    means = []
+    for high, low, temp in zip(highs, lows, temps):
+        if high is not None and low is not None:
+            means.append((high + low) / 2.0)
+        else:
+            means.append(temp)
+    return highs, lows, means
+
+
+def _degree_output(series, values):
+    """
+    Degree days are temperature differences, scaled to the units of the response.
+    """
+    if _units(series) == 'I':
+        return [None if value is None else value * 9.0 / 5.0 for value in values]
+    return values
+
+
+def heat_index(series):
+    """
+    NWS heat index from temp, and rh (Rothfusz regression, with the Steadman
+    approximation below 80F).
+    """
+    from_fahrenheit = converter('temperature', 'I', _units(series))
+    values = []
+    for temp, rh in zip(_temperature(series, 'temp'), _column(series, 'rh')):
+        if temp is None or rh is None:
+            values.append(None)
+            continue
+        t = temp * 9.0 / 5.0 + 32.0
+        hi = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+        if (hi + t) / 2.0 >= 80.0:
+            hi = (-42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh - 0.00683783 * t * t
+                  - 0.05481717 * rh * rh + 0.00122874 * t * t * rh + 0.00085282 * t * rh * rh
+                  - 0.00000199 * t * t * rh * rh)
+            if rh < 13 and 80.0 <= t <= 112.0:
+                hi -= ((13.0 - rh) / 4.0) * math.sqrt((17.0 - abs(t - 95.0)) / 17.0)
+            elif rh > 85 and 80.0 <= t <= 87.0:
+                hi += ((rh - 85.0) / 10.0) * ((87.0 - t) / 5.0)
+        values.append(from_fahrenheit(hi))
+    return values
+
+
+def wind_chill(series):
+    """
+    NWS wind chill from temp, and wind_spd. Equal to temp outside the
+    formula's range (above 50F, or winds below 3 mph).
+    """
+    from_fahrenheit = converter('temperature', 'I', _units(series))
+    to_mph = converter('speed', _units(series), 'I')
+    values = []
+    for temp, speed in zip(_temperature(series, 'temp'), _column(series, 'wind_spd')):
+        if temp is None or speed is None:
+            values.append(None)
+            continue
+        t = temp * 9.0 / 5.0 + 32.0
+        v = to_mph(speed)
+        if t > 50.0 or v < 3.0:
+            values.append(from_fahrenheit(t))
+            continue
+        wc = 35.74 + 0.6215 * t - 35.75 * v ** 0.16 + 0.4275 * t * v ** 0.16
+        values.append(from_fahrenheit(wc))
+    return values
+
+
+def growing_degree_days(series, base=10.0, cap=30.0):
+    """
+    Growing degree days from max_temp, and min_temp (or temp), with base
+    and cap temperatures in Celsius.
+    """
+    values = []
+    for high, low, mean in zip(*_daily_temperatures(series)):
+        if high is not None and low is not None:
+            mean = (min(max(high, base), cap) + min(max(low, base), cap)) / 2.0
+        values.append(None if mean is None else max(0.0, mean - base))
+    return _degree_output(series, values)
+
+
+def heating_degree_days(series, base=18.3):
+    """
+    Heating degree days, base temperature in Celsius (18.3C is 65F).
+    """
+    means = _daily_temperatures(series)[2]
+    return _degree_output(series, [None if mean is None else max(0.0, base - mean) for mean in means])
+
+
+def cooling_degree_days(series, base=18.3):
+    """
+    Cooling degree days, base temperature in Celsius (18.3C is 65F).
+    """
+    means = _daily_temperatures(series)[2]
+    return _degree_output(series, [None if mean is None else max(0.0, mean - base) for mean in means])
+
+
+def _wind_components(series):
+    components = []
+    for speed, direction in zip(_column(series, 'wind_spd'), _column(series, 'wind_dir')):
+        if speed is None or direction is None:
+            components.append((None, None))
+        else:
+            # Meteorological convention: wind_dir is where the wind blows from.
+            radians = math.radians(direction)
+            components.append((-speed * math.sin(radians), -speed * math.cos(radians)))
+    return components
+
+
+def wind_u(series):
+    """
+    Eastward wind component, in the speed units of the response.
+    """
+    return [u for u, v in _wind_components(series)]
+
+
+def wind_v(series):
+    """
+    Northward wind component, in the speed units of the response.
+    """
+    return [v for u, v in _wind_components(series)]
+
+
+def _extraterrestrial_radiation(lat, day_of_year):
+    """
+    Daily extraterrestrial radiation (MJ/m2/day), FAO-56 equation 21.
+    """
+    phi = math.radians(lat)
+    dr = 1 + 0.033 * math.cos(2 * math.pi * day_of_year / 365.0)
+    delta = 0.409 * math.sin(2 * math.pi * day_of_year / 365.0 - 1.39)
+    ws = math.acos(max(-1.0, min(1.0, -math.tan(phi) * math.tan(delta))))
+    return (24 * 60 / math.pi) * 0.0820 * dr * (ws * math.sin(phi) * math.sin(delta)
+                                               + math.cos(phi) * math.cos(delta) * math.sin(ws))
+
+
+def _day_of_year(point):
+    """
+    Day of year of a point, from its datetime, or its normals month, and day
+    (mid month for monthly normals). Normals use a leap year, for February 29.
+    """
+    if getattr(point, 'datetime', None) is not None:
+        return point.datetime.timetuple().tm_yday
+    month = getattr(point, 'month', None)
+    if month is not None:
+        return datetime.date(2000, month, getattr(point, 'day', None) or 15).timetuple().tm_yday
+    return None
+
+
+def reference_evapotranspiration(series):
+    """
+    Daily reference evapotranspiration (Hargreaves), from max_temp,
+    min_temp, the latitude, and the day of year of each point. In mm, or inches
+    for imperial units.
+    """
+    to_depth = converter('depth', 'M', _units(series))
+    highs, lows, means = _daily_temperatures(series)
+    values = []
+    for point, high, low, mean in zip(series.points, highs, lows, means):
+        lat = getattr(series, 'lat', None)
+        if lat is None:
+            lat = getattr(point, 'lat', None)
+        day_of_year = _day_of_year(point)
+        if high is None or low is None or lat is None or day_of_year is None:
+            values.append(None)
+            continue
+        ra = _extraterrestrial_radiation(lat, day_of_year)
+        et0 = 0.0023 * 0.408 * ra * (mean + 17.8) * math.sqrt(max(0.0, high - low))
+        values.append(to_depth(et0))
+    return values
+
+
+DERIVED_VARIABLES = {
+    'heat_index': heat_index,
+    'wind_chill': wind_chill,
+    'gdd': growing_degree_days,
+    'hdd': heating_degree_days,
+    'cdd': cooling_degree_days,
+    'wind_u': wind_u,
+    'wind_v': wind_v,
+    'et0': reference_evapotranspiration,
+}
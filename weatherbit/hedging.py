@@ -0,0 +1,125 @@
+"""
+Hedged requests: when a request is slower than a percentile of the recent
+latencies, a duplicate request is sent, and whichever answers first is used.
+
+Hedges are limited to a fraction of the requests (max_rate), so a slow API
+does not see its load doubled. The slower request is not cancelled, its
+response is discarded. Each request runs in a thread of its own, so that
+any number of callers can be hedged without queueing behind each other.
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED, TimeoutError
+
+from weatherbit.transport import DeadlineExceeded
+
+
+def _start(function, *args):
+    """
+    Calls function(*args) in a new daemon thread, returns the Future of its result.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(function(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return future
+
+
+class Hedger(object):
+    def __init__(self, percentile=95, max_rate=0.05, min_delay=0.01, window=1000, min_samples=20):
+        """
+        Sends a hedge after the 'percentile' latency of the last 'window'
+        requests (at least min_delay seconds), once min_samples latencies
+        are known, for at most max_rate of the requests.
+        """
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._delay = None
+        self._lock = threading.Lock()
+        self._metrics = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_denied': 0}
+
+    def metrics(self):
+        """
+        Returns the counters: requests, hedged (hedges sent), hedge_wins
+        (hedges answering first), budget_denied (hedges skipped by max_rate),
+        and the current hedge delay in seconds (None until min_samples).
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['delay'] = self._delay
+        return metrics
+
+    def _record(self, started):
+        with self._lock:
+            self._latencies.append(time.time() - started)
+            if len(self._latencies) >= self.min_samples and len(self._latencies) % 10 == 0:
+                latencies = sorted(self._latencies)
+                index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100.0))
+                self._delay = max(self.min_delay, latencies[index])
+
+    def _timed(self, fetch, timeout):
+        started = time.time()
+        result = fetch(timeout)
+        self._record(started)
+        return result
+
+    def _allow_hedge(self):
+        with self._lock:
+            if self._metrics['hedged'] + 1 > self.max_rate * self._metrics['requests']:
+                self._metrics['budget_denied'] += 1
+                return False
+            self._metrics['hedged'] += 1
+            return True
+
+    def call(self, fetch, timeout=None):
+        """
+        Calls fetch(timeout) (ie. an HTTP request), with the seconds left
+        before the deadline, and hedges it when slow. Waits at most timeout
+        seconds, then raises DeadlineExceeded. Raises the first exception if
+        every attempt failed.
+        """
+        with self._lock:
+            self._metrics['requests'] += 1
+            delay = self._delay
+        if delay is None or (timeout is not None and delay >= timeout):
+            return self._timed(fetch, timeout)
+
+        deadline = time.time() + timeout if timeout is not None else None
+        primary = _start(self._timed, fetch, timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            try:
+                return primary.result(timeout=None if deadline is None else max(0.0, deadline - time.time()))
+            except TimeoutError:
+                raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+
+        remaining = None if deadline is None else deadline - time.time()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+        hedge = _start(self._timed, fetch, remaining)
+        pending = set([primary, hedge])
+        error = None
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self._metrics['hedge_wins'] += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
@@ -0,0 +1,64 @@
+"""
+Timestamp aligned join of several TimeSeries responses (ie. standard weather,
+air quality, and agweather for one location) into a single columnar table.
+"""
+from weatherbit.utils import TIME_VARS, point_columns
+
+
+def _prefix(name, prefixes):
+    if prefixes is not None and name in prefixes:
+        return prefixes[name]
+    return '' if name == 'weather' else name + '_'
+
+
+def join_series(series, how='outer', api_vars=None, prefixes=None):
+    """
+    Joins a list of (source name, TimeSeries) pairs on timestamp_utc.
+    'how' is 'outer' (every timestamp) or 'inner' (timestamps in every
+    source). Variables keep their name for the 'weather' source, and are
+    prefixed with the source name for the others (ie. 'airquality_pm25'),
+    whatever the variables of the other sources, unless 'prefixes' maps the
+    source name to another prefix. Returns a dict of equal length columns,
+    sorted by timestamp_utc, with None for missing values.
+    """
+    if how not in ['outer', 'inner']:
+        raise Exception("Unsupported join. Use 'outer' or 'inner'.")
+
+    sources = []
+    for name, response in series:
+        points = [point for point in response.points if point.timestamp_utc is not None]
+        sources.append((name, points, point_columns(points, api_vars)))
+
+    timestamps = None
+    for name, points, columns in sources:
+        source_timestamps = set(point.timestamp_utc for point in points)
+        if timestamps is None:
+            timestamps = source_timestamps
+        elif how == 'outer':
+            timestamps |= source_timestamps
+        else:
+            timestamps &= source_timestamps
+    timestamps = sorted(timestamps or [])
+    rows = dict((timestamp, i) for i, timestamp in enumerate(timestamps))
+
+    table = {'timestamp_utc': timestamps}
+    for var in TIME_VARS[1:]:
+        table[var] = [None] * len(timestamps)
+    for name, points, columns in sources:
+        positions = [rows.get(point.timestamp_utc) for point in points]
+        for var in TIME_VARS[1:]:
+            column = table[var]
+            for position, point in zip(positions, points):
+                if position is not None and column[position] is None:
+                    column[position] = getattr(point, var)
+        for var, values in columns.items():
+            column = [None] * len(timestamps)
+            for position, value in zip(positions, values):
+                if position is not None:
+                    column[position] = value
+            column_name = _prefix(name, prefixes) + var
+            if column_name in table:
+                raise Exception("Column '{}' of source '{}' is already in the table, use other prefixes.".format(
+                    column_name, name))
+            table[column_name] = column
+    return table
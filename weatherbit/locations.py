@@ -0,0 +1,94 @@
+"""
+Resolves city, postal code, city id and station queries to the canonical
+coordinates returned by the API.
+
+The resolver learns the coordinates from each response, and rewrites later
+queries for the same place to lat/lon, so different spellings of a place
+(ie. "Raleigh,NC" and "raleigh, nc") share one URL, and one cache entry with
+coordinate queries.
+"""
+import os
+import re
+import json
+import threading
+
+# Location arguments resolved to coordinates, and the arguments qualifying them.
+TEXT_LOCATIONS = ['city', 'postal_code', 'city_id', 'station']
+QUALIFIERS = ['state', 'country']
+LOCATION_FIELDS = ['lat', 'lon', 'city_name', 'timezone', 'country_code', 'state_code']
+
+
+def _normalize(value):
+    value = re.sub(r'\s+', ' ', str(value).strip().lower())
+    return re.sub(r'\s*,\s*', ',', value)
+
+
+class LocationResolver(object):
+    def __init__(self, path=None):
+        """
+        'path' is an optional JSON file persisting the learned locations.
+        """
+        self.path = path
+        self._locations = {}
+        self._lock = threading.Lock()
+        if path and os.path.isfile(path):
+            with open(path) as f:
+                self._locations = json.load(f)
+
+    def query_key(self, kwargs):
+        """
+        Returns the normalized key of a textual location query, or None.
+        """
+        for name in TEXT_LOCATIONS:
+            if name in kwargs:
+                parts = [name, _normalize(kwargs[name])]
+                parts.extend(_normalize(kwargs.get(qualifier, '')) for qualifier in QUALIFIERS)
+                return '|'.join(parts)
+        return None
+
+    def resolve(self, kwargs):
+        """
+        Returns the learned location (lat, lon, city_name, timezone...) of a query, or None.
+        """
+        key = self.query_key(kwargs)
+        if key is None:
+            return None
+        return self._locations.get(key)
+
+    def rewrite(self, kwargs):
+        """
+        Returns the query arguments with a known textual location replaced by its coordinates.
+        """
+        if 'lat' in kwargs and 'lon' in kwargs:
+            return kwargs
+        location = self.resolve(kwargs)
+        if location is None:
+            return kwargs
+        kwargs = dict((name, value) for name, value in kwargs.items() if name not in TEXT_LOCATIONS + QUALIFIERS)
+        kwargs['lat'] = location['lat']
+        kwargs['lon'] = location['lon']
+        return kwargs
+
+    def learn(self, kwargs, response):
+        """
+        Records the location returned in response for a textual query.
+        """
+        key = self.query_key(kwargs)
+        if key is None or 'lat' in kwargs:
+            return
+        source = response
+        if getattr(response, 'lat', None) is None and getattr(response, 'points', None):
+            # Current conditions carry the location on each point.
+            source = response.points[0]
+        location = dict((field, getattr(source, field, None)) for field in LOCATION_FIELDS)
+        if location['lat'] is None or location['lon'] is None:
+            return
+
+        with self._lock:
+            if self._locations.get(key) == location:
+                return
+            self._locations[key] = location
+            if self.path:
+                with open(self.path + '.tmp', 'w') as f:
+                    json.dump(self._locations, f)
+                os.replace(self.path + '.tmp', self.path)
@@ -1,25 +1,231 @@
-from weatherbit.utils import UnicodeMixin, PropertyUnavailable
+from weatherbit.utils import UnicodeMixin, PropertyUnavailable, is_number, units_from_url
+from weatherbit import serialization, aggregate, derived
+from weatherbit.units import convert_points
+import bisect
 import datetime
 import requests
 
-class TimeSeries(UnicodeMixin):
-    def __init__(self, data, response, headers):
-        self.response = response
-        self.http_headers = headers
-        self.json = data
+# Timeout (seconds) of update() on responses created without an Api loader.
+FALLBACK_TIMEOUT = 60
+
+# Headers kept by response objects created in lean mode.
+LEAN_HEADERS = ['Date', 'Last-Modified', 'ETag', 'Cache-Control', 'X-RateLimit-Limit',
+                'X-RateLimit-Remaining', 'X-RateLimit-Reset']
+
+class ApiResponse(UnicodeMixin):
+    """""
+    Base class for the API response classes.
+    """""
+    _meta_fields = []
+    _point_list_names = ['points']
+    # Units of the points when known: the units of the request URL, or the
+    # units set by convert_units().
+    units = None
+
+    def _retain(self, data, response, headers):
+        """""
+        Keeps the decoded JSON and the response alongside the parsed points.
+        In lean mode only the request URL, and the headers listed in
+        LEAN_HEADERS are kept, which is all get() and update() need.
+        """""
+        # Data refreshed by update() comes in the units first fetched.
+        fetched_units = self.__dict__.get('_fetched_units')
+        if fetched_units is not None and fetched_units != self.units:
+            for points in self._point_lists():
+                convert_points(points, fetched_units, self.units)
+
+        self._set_url(response.url if response is not None else None)
+        if self._lean:
+            for points in self._point_lists():
+                for point in points:
+                    point._compact()
+            self.json = None
+            self.response = None
+            self.http_headers = {}
+            if headers is not None:
+                for header in LEAN_HEADERS:
+                    if header in headers:
+                        self.http_headers[header] = headers[header]
+        else:
+            self.json = data
+            self.response = response
+            self.http_headers = headers
+
+    def _set_url(self, url):
+        """""
+        Sets the request URL. The points of a first load are in the units of the URL.
+        """""
+        self.url = url
+        if url is not None and self.units is None:
+            self.units = self._fetched_units = units_from_url(url)
+
+    def _point_lists(self):
+        return [getattr(self, name) for name in self._point_list_names if getattr(self, name)]
+
+    def _response_meta(self):
+        """""
+        The location fields, and units of the response, as passed to _from_points().
+        """""
+        meta = dict((field, getattr(self, field, None)) for field in self._meta_fields)
+        meta['units'] = self.units
+        meta['fetched_units'] = self.__dict__.get('_fetched_units')
+        return meta
+
+    def convert_units(self, units, source=None):
+        """""
+        Converts the points in place to units ('M', 'I' or 'S'), from source
+        (default: the current units of the response, or metric). update()
+        keeps the converted units. Returns the response.
+        """""
+        source = source or self.units or 'M'
+        if '_fetched_units' not in self.__dict__:
+            self._fetched_units = source
+        for points in self._point_lists():
+            convert_points(points, source, units)
+        self.units = units
+        self.__dict__.pop('_shared', None)
+        self.__dict__.pop('_derived', None)
+        return self
+
+    def iter_series(self, api_vars=None, batch_size=None, as_tuples=False):
+        """""
+        Generator counterpart of get(): yields the same rows one at a time,
+        in time order, without building the whole list. With batch_size,
+        yields lists of up to batch_size rows. With as_tuples, rows are
+        tuples of the variables (api_vars, or every field of the point class
+        in alphabetical order, None included), followed by the time
+        variables, see series_columns().
+        """""
+        return self._iter_series(self.points, api_vars, batch_size, as_tuples)
+
+    def series_columns(self, api_vars=None):
+        """""
+        Returns the column names of the rows of iter_series(api_vars, as_tuples=True).
+        """""
+        return self._series_columns(self.points, api_vars)
+
+    def _iter_series(self, points, api_vars=None, batch_size=None, as_tuples=False, sort=True):
+        return self._stream(*self._series_layout(points, api_vars, sort, as_tuples), batch_size=batch_size, as_tuples=as_tuples)
+
+    def _series_columns(self, points, api_vars=None):
+        points, api_vars, time_vars, _, extra = self._series_layout(points, api_vars, False, True)
+        if not api_vars:
+            api_vars = _tuple_vars(points, time_vars)
+        return api_vars + time_vars + [name for name, _ in extra or []]
+
+    def _stream(self, points, api_vars, time_vars, sort_key, extra=None, batch_size=None, as_tuples=False):
+        # sort_key is None for points already in order, ie. those of a SeriesView.
+        if api_vars is not None:
+            if type(api_vars) != list:
+                raise Exception("Field list must be list. Example: ['temp','slp']. See https://www.weatherbit.io/api for specific fields") 
+        if len(points) == 0:
+            return iter([])
+
+        exclude_none = not api_vars
+        if exclude_none and as_tuples:
+            # Every field of the point class, the same columns for any response.
+            api_vars = _tuple_vars(points, time_vars)
+        elif exclude_none:
+            # If api_vars is None or empty, include all non-None attributes
+            api_vars = _default_vars(points)
+        order = None if sort_key is None else _sorted_order(points, sort_key)
+        rows = _iter_rows(points, order, api_vars, exclude_none and not as_tuples,
+                          time_vars, extra or [], as_tuples)
+        if batch_size:
+            return _batches(rows, batch_size)
+        return rows
+
+    def derive(self, name, **params):
+        """""
+        Returns a derived variable ('heat_index', 'wind_chill', 'gdd', 'hdd',
+        'cdd', 'wind_u', 'wind_v' or 'et0', see weatherbit.derived) as a list
+        with one value per point. Results are cached until the points change.
+        """""
+        if name not in derived.DERIVED_VARIABLES:
+            raise Exception("Unsupported derived variable '{}'. Use one of: {}".format(
+                name, ', '.join(sorted(derived.DERIVED_VARIABLES))))
+        cache = self.__dict__.get('_derived')
+        if cache is None or cache[0] is not self.points or cache[1] != len(self.points):
+            cache = self._derived = (self.points, len(self.points), {})
+        key = (name, tuple(sorted(params.items())))
+        if key not in cache[2]:
+            cache[2][key] = derived.DERIVED_VARIABLES[name](self, **params)
+        return cache[2][key]
+
+    def to_bytes(self):
+        """""
+        Serializes the parsed response into a compact binary layout
+        (see weatherbit.serialization). The decoded JSON and the HTTP
+        response are not included.
+        """""
+        meta = self._response_meta()
+        meta['url'] = self.url
+        meta['http_headers'] = dict(self.http_headers) if self.http_headers is not None else None
+        point_lists = [(name, getattr(self, name)) for name in self._point_list_names]
+        return serialization.dumps(meta, point_lists)
+
+    @classmethod
+    def from_bytes(cls, data, loader=None):
+        """""
+        Rebuilds a response serialized by to_bytes(). The result is a lean
+        response object, pass a loader (ie. Api._refresh) to use its JSON backend on update().
+        """""
+        meta, point_lists = serialization.loads(data, POINT_CLASSES)
+        return cls._from_points(meta, point_lists, loader)
+
+    @classmethod
+    def _from_points(cls, meta, point_lists, loader=None):
+        """""
+        Builds a lean response object from already parsed points. 'meta'
+        holds attributes, and the units the points were fetched in.
+        """""
+        meta = dict(meta)
+        fetched_units = meta.pop('fetched_units', None)
+        response = cls.__new__(cls)
+        response._loader = loader
+        response._lean = True
+        response.json = None
+        response.response = None
+        response.url = None
+        response.http_headers = {}
+        for name in cls._point_list_names:
+            setattr(response, name, [])
+        for field, value in meta.items():
+            setattr(response, field, value)
+        for name, points in point_lists:
+            setattr(response, name, points)
+        if fetched_units is not None:
+            response._fetched_units = fetched_units
+        return response
+
+    def _fetch(self, url):
+        if url is None:
+            raise Exception('This response has no request URL to update() from, ie. it was built by resample(), '
+                            'rolling(), or read from an archive.')
+        if self._loader is not None:
+            return self._loader(url)
+        r = requests.get(url, timeout=FALLBACK_TIMEOUT)
+        return r.json(), r
+
+class TimeSeries(ApiResponse):
+    _meta_fields = ['city_name', 'lat', 'lon', 'country_code', 'state_code', 'timezone']
+
+    def __init__(self, data, response, headers, loader=None, lean=False):
+        self._loader = loader
+        self._lean = lean
         self.points = []
-        self._load(self.json)
+        self._load(data)
+        self._retain(data, response, headers)
 
             
     def update(self):
         """""
         Call update() to refresh the object state, and any stale data from the API.
         """""
-        r = requests.get(self.response.url)
-        self.json = r.json()
-        self.response = r
+        data, response = self._fetch(self.url)
         self.points = []
-        self._load(self.json)
+        self._load(data)
+        self._retain(data, response, response.headers)
 
     def _load(self, response):
         self.city_name = response.get('city_name')
@@ -39,12 +245,113 @@ class TimeSeries(UnicodeMixin):
     def get(self, api_vars=None):
         return self.get_series(api_vars)
 
+    def resample(self, granularity, how=None):
+        """""
+        Aggregates the series locally into 'hourly', 'daily' (local days) or
+        datetime.timedelta buckets, ie. an hourly History into a daily one.
+        See weatherbit.aggregate for the aggregation of each variable.
+        """""
+        return aggregate.resample(self, granularity, how)
+
+    def rolling(self, window, api_vars=None, how=None):
+        """""
+        Trailing rolling aggregation over a datetime.timedelta, or a number of points.
+        """""
+        return aggregate.rolling(self, window, api_vars, how)
+
+    def _timestamps(self):
+        """""
+        The timestamp_utc of each point, rebuilt when the points change.
+        """""
+        index = self.__dict__.get('_index')
+        if index is None or index[0] is not self.points or len(index[1]) != len(self.points):
+            index = (self.points, [point.timestamp_utc for point in self.points])
+            self._index = index
+        return index[1]
+
+    def at(self, timestamp):
+        """""
+        Returns the point at timestamp (UTC), or None.
+        """""
+        timestamps = self._timestamps()
+        i = bisect.bisect_left(timestamps, timestamp)
+        if i < len(timestamps) and timestamps[i] == timestamp:
+            return self.points[i]
+        return None
+
+    def nearest(self, timestamp):
+        """""
+        Returns the point closest to timestamp (UTC), or None if there are no points.
+        """""
+        timestamps = self._timestamps()
+        if not timestamps:
+            return None
+        i = bisect.bisect_left(timestamps, timestamp)
+        if i == 0:
+            return self.points[0]
+        if i == len(timestamps):
+            return self.points[-1]
+        if timestamps[i] - timestamp < timestamp - timestamps[i - 1]:
+            return self.points[i]
+        return self.points[i - 1]
+
+    def interpolate(self, timestamp, api_vars):
+        """""
+        Returns a dict of the variables in api_vars linearly interpolated at
+        timestamp (UTC), or None if timestamp is outside the series. wind_dir
+        is interpolated along the shortest arc, non-numeric variables take the
+        value of the nearest point.
+        """""
+        timestamps = self._timestamps()
+        i = bisect.bisect_left(timestamps, timestamp)
+        if i == len(timestamps) or (i == 0 and timestamps[0] != timestamp):
+            return None
+
+        after = self.points[i]
+        before = self.points[i - 1] if timestamps[i] != timestamp else after
+        span = (after.timestamp_utc - before.timestamp_utc).total_seconds()
+        weight = (timestamp - before.timestamp_utc).total_seconds() / span if span else 0.0
+        nearest = after if weight >= 0.5 else before
+
+        series_point = {'timestamp_utc': timestamp}
+        for var in api_vars:
+            start, end = getattr(before, var), getattr(after, var)
+            if not is_number(start) or not is_number(end):
+                series_point[var] = getattr(nearest, var)
+            elif var in ['wind_dir', 'max_wind_dir']:
+                delta = (end - start + 180) % 360 - 180
+                series_point[var] = (start + weight * delta) % 360
+            else:
+                series_point[var] = start + weight * (end - start)
+        return series_point
+
+    def slice(self, start=None, end=None):
+        """""
+        Returns a SeriesView of the points where start <= timestamp_utc < end,
+        without copying them. start and end may be None.
+        """""
+        timestamps = self._timestamps()
+        lo = 0 if start is None else bisect.bisect_left(timestamps, start)
+        hi = len(timestamps) if end is None else bisect.bisect_left(timestamps, end)
+        return SeriesView(self, [(lo, max(lo, hi))])
+
     def get_series(self, api_vars=None):
         """""
         Accepts either a list of variables, or a string (single var)
         Returns a list (sorted by datetime) of objects with the variables
         requested, and their corresponding dates.
         """""
+        return self._get_series(self.points, api_vars)
+
+    def _series_layout(self, points, api_vars, sort, as_tuples):
+        """""
+        The points, variables, time variables, sort key, and extra (name,
+        value) columns of the rows of iter_series().
+        """""
+        return (points, api_vars, ['datetime', 'timestamp_utc', 'timestamp_local'],
+                (lambda p: p.timestamp_utc) if sort else None, None)
+
+    def _get_series(self, points, api_vars=None, sort=True):
         series = []
         exclude_none = False
 
@@ -54,10 +361,10 @@ class TimeSeries(UnicodeMixin):
 
         if api_vars is None or not api_vars or api_vars == []:
             # If api_vars is None or empty, include all non-None attributes
-            api_vars = [attr for attr in dir(self.points[0]) if not callable(getattr(self.points[0], attr)) and not attr.startswith("__")]
+            api_vars = _default_vars(points)
             exclude_none = True
 
-        for p in self.points:
+        for p in points:
             series_point = {}
             for var in api_vars:
                 try:
@@ -75,29 +382,73 @@ class TimeSeries(UnicodeMixin):
             series.append(series_point)
 
         # Sort by datetime.
-        series.sort(key=lambda p: p['timestamp_utc'])
+        if sort:
+            series.sort(key=lambda p: p['timestamp_utc'])
         return series
 
-class NormalsTimeSeries(UnicodeMixin):
-    def __init__(self, data, response, headers):
-        self.response = response
-        self.http_headers = headers
-        self.json = data
+class NormalsTimeSeries(ApiResponse):
+    _meta_fields = ['city_name', 'lat', 'lon', 'country_code', 'state_code', 'timezone']
+
+    def __init__(self, data, response, headers, loader=None, lean=False):
+        self._loader = loader
+        self._lean = lean
         self.points = []
-        self._load(self.json)
+        self._load(data)
+        self._retain(data, response, headers)
 
     def _sorting_key(self, point):
         return (point.month, point.day, point.hour)
 
+    def _keys(self):
+        """""
+        The (month, day, hour) of each point, None as 0, and whether they are
+        in order, rebuilt when the points change.
+        """""
+        index = self.__dict__.get('_index')
+        if index is None or index[0] is not self.points or len(index[1]) != len(self.points):
+            keys = [_normals_key(self._sorting_key(point)) for point in self.points]
+            index = (self.points, keys, all(keys[i - 1] <= keys[i] for i in range(1, len(keys))))
+            self._index = index
+        return index[1], index[2]
+
+    def at(self, month, day=None, hour=None):
+        """""
+        Returns the point for month, day and hour, or None.
+        """""
+        keys, ordered = self._keys()
+        key = _normals_key((month, day, hour))
+        if not ordered:
+            # A window wrapping across the end of the year (see weatherbit.normals).
+            return self.points[keys.index(key)] if key in keys else None
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self.points[i]
+        return None
+
+    def slice(self, start=None, end=None):
+        """""
+        Returns a SeriesView of the points from start (inclusive) to end
+        (exclusive), without copying them. start and end are (month, day)
+        or (month, day, hour) tuples, and may be None. The view wraps
+        across the end of the year when start is after end.
+        """""
+        keys, ordered = self._keys()
+        if not ordered:
+            raise Exception('slice() requires points in (month, day, hour) order, not a window wrapping across the year.')
+        lo = 0 if start is None else bisect.bisect_left(keys, _normals_key(start))
+        hi = len(keys) if end is None else bisect.bisect_left(keys, _normals_key(end))
+        if lo <= hi:
+            return SeriesView(self, [(lo, hi)])
+        return SeriesView(self, [(lo, len(keys)), (0, hi)])
+
     def update(self):
         """""
         Call update() to refresh the object state, and any stale data from the API.
         """""
-        r = requests.get(self.response.url)
-        self.json = r.json()
-        self.response = r
+        data, response = self._fetch(self.url)
         self.points = []
-        self._load(self.json)
+        self._load(data)
+        self._retain(data, response, response.headers)
 
     def _load(self, response):
         self.city_name = response.get('city_name')
@@ -120,9 +471,24 @@ class NormalsTimeSeries(UnicodeMixin):
     def get_series(self, api_vars=None):
         """""
         Accepts either a list of variables, or a string (single var)
-        Returns a list (sorted by datetime) of objects with the variables
-        requested, and their corresponding dates.
+        Returns a list (in the order of the points) of objects with the
+        variables requested, and their corresponding dates.
+        """""
+        # Points are sorted on load, or in the order of a window wrapping
+        # across the end of the year (see weatherbit.normals).
+        return self._get_series(self.points, api_vars, sort=False)
+
+    def iter_series(self, api_vars=None, batch_size=None, as_tuples=False):
         """""
+        Same as get_series(), as a generator (see ApiResponse.iter_series()).
+        """""
+        return self._iter_series(self.points, api_vars, batch_size, as_tuples, sort=False)
+
+    def _series_layout(self, points, api_vars, sort, as_tuples):
+        return (points, api_vars, ['month', 'day', 'hour'],
+                (lambda p: _normals_key(self._sorting_key(p))) if sort else None, None)
+
+    def _get_series(self, points, api_vars=None, sort=True):
         series = []
         exclude_none = False
 
@@ -132,11 +498,11 @@ class NormalsTimeSeries(UnicodeMixin):
 
         if api_vars is None or not api_vars:
             # If api_vars is None or empty, include all non-None attributes
-            api_vars = [attr for attr in dir(self.points[0]) if not callable(getattr(self.points[0], attr)) and not attr.startswith("__")]
+            api_vars = _default_vars(points)
             exclude_none = True
 
 
-        for p in self.points:
+        for p in points:
             series_point = {}
             for var in api_vars:
                 try:
@@ -149,36 +515,39 @@ class NormalsTimeSeries(UnicodeMixin):
                 except AttributeError as e:
                     raise e
             series_point['month'] = p.month
-            series_point['day'] = p.month
+            series_point['day'] = p.day
             series_point['hour'] = p.hour
             series.append(series_point)
 
         # Sort by datetime.
-        series = sorted(series, key=lambda x: (x.get('month', None), x.get('day', None), x.get('hour', None)))
+        if sort:
+            series = sorted(series, key=lambda x: (x.get('month', None), x.get('day', None), x.get('hour', None)))
         return series
 
-class SingleTime(UnicodeMixin):
-    def __init__(self, data, response, headers):
-        self.response = response
-        self.http_headers = headers
-        self.json = data
+class SingleTime(ApiResponse):
+    _meta_fields = ['count']
+    _point_list_names = ['points', 'points_minutely', 'points_alerts']
+
+    def __init__(self, data, response, headers, loader=None, lean=False):
+        self._loader = loader
+        self._lean = lean
         self.points = []
         self.points_minutely = []
         self.points_alerts = []
-        self._load(self.json)
+        self._load(data)
+        self._retain(data, response, headers)
 
             
     def update(self):
         """""
         Call update() to refresh the object state, and any stale data from the API.
         """""
-        r = requests.get(self.response.url)
-        self.json = r.json()
-        self.response = r
+        data, response = self._fetch(self.url)
         self.points = []
         self.points_minutely = None
         self.points_alerts = None
-        self._load(self.json)
+        self._load(data)
+        self._retain(data, response, response.headers)
 
     def _load(self, response):
         if 'count' in response:
@@ -210,11 +579,49 @@ class SingleTime(UnicodeMixin):
         # Sort by datetime.
         self.points_alerts.sort(key=lambda p: p.effective_utc)
 
+    def get_minutely(self):
+        """""
+        Returns the minutely forecast as a list of dicts, or None. The list
+        is built once, and the same list is included in every point of get().
+        """""
+        return self._shared_series('points_minutely')
+
+    def get_alerts(self):
+        """""
+        Returns the alerts as a list of dicts, or None. The list is built
+        once, and the same list is included in every point of get().
+        """""
+        return self._shared_series('points_alerts')
+
+    def _shared_series(self, name):
+        points = getattr(self, name)
+        if points is None:
+            return None
+        shared = self.__dict__.setdefault('_shared', {})
+        cached = shared.get(name)
+        if cached is None or cached[0] is not points or cached[1] != len(points):
+            series = [{key: value for key, value in vars(pt).items() if not callable(value) and value is not None} for pt in points]
+            cached = shared[name] = (points, len(points), series)
+        return cached[2]
+
+    def _series_layout(self, points, api_vars, sort, as_tuples):
+        if len(points) > 0:
+            # Tuples always have both columns, None when missing.
+            extra = [(name, series) for name, series in [('minutely', self.get_minutely()), ('alerts', self.get_alerts())]
+                     if series is not None or as_tuples]
+            return (points, api_vars, ['datetime', 'timestamp_utc', 'timestamp_local'],
+                    (lambda p: p.datetime) if sort else None, extra)
+        # Like get(), alerts only responses yield every non-None attribute of the alerts.
+        return (self.points_alerts or [], None, ['effective_utc', 'effective_local'],
+                (lambda p: p.effective_utc) if sort else None, None)
+
     def get(self, api_vars=None):
         """""
         Accepts either a list of variables, or a string (single var)
         Returns a list (sorted by datetime) of objects with the variables
-        requested, and their corresponding dates.
+        requested, and their corresponding dates. The 'minutely' and
+        'alerts' lists are shared by all points (see get_minutely(), and
+        get_alerts()), copy them before modifying.
         """""
         series = []
         exclude_none = False
@@ -224,9 +631,13 @@ class SingleTime(UnicodeMixin):
                 raise Exception("Field list must be list. Example: ['temp','slp']. See https://www.weatherbit.io/api for specific fields") 
 
         if len(self.points) > 0:
+            # Built once, and shared by every point.
+            minutely = self.get_minutely()
+            alerts = self.get_alerts()
+
             if api_vars is None or not api_vars:
                 # If api_vars is None or empty, include all non-None attributes
-                api_vars = [attr for attr in dir(self.points[0]) if not callable(getattr(self.points[0], attr)) and not attr.startswith("__")]
+                api_vars = _default_vars(self.points)
                 exclude_none = True
 
             for p in self.points:
@@ -244,22 +655,18 @@ class SingleTime(UnicodeMixin):
                 series_point['datetime'] = p.datetime
                 series_point['timestamp_utc'] = p.timestamp_utc
                 series_point['timestamp_local'] = p.timestamp_local
-                if self.points_minutely is not None:
-                    series_point['minutely'] = []
-                    for pt in self.points_minutely:
-                        series_point['minutely'].append({key: value for key, value in vars(pt).items() if not callable(value) and value is not None})
+                if minutely is not None:
+                    series_point['minutely'] = minutely
 
-                if self.points_alerts is not None:
-                    series_point['alerts'] = []
-                    for pt in self.points_alerts:
-                        series_point['alerts'].append({key: value for key, value in vars(pt).items() if not callable(value) and value is not None})
+                if alerts is not None:
+                    series_point['alerts'] = alerts
 
                 series.append(series_point)
             series.sort(key=lambda p: p['datetime'])
         elif self.points_alerts is not None:
             # If api_vars is None or empty, include all non-None attributes
             if len(self.points_alerts) > 0:
-                api_vars = [attr for attr in dir(self.points_alerts[0]) if not callable(getattr(self.points_alerts[0], attr)) and not attr.startswith("__")]
+                api_vars = _default_vars(self.points_alerts)
             exclude_none = True
 
             for p in self.points_alerts:
@@ -277,7 +684,222 @@ class SingleTime(UnicodeMixin):
             series.sort(key=lambda p: p['effective_utc'])
         return series
 
-class Point(UnicodeMixin):
+class SeriesView(UnicodeMixin):
+    """""
+    Read-only view of a range of the points of a response. Returned by
+    slice(), it references the points of the response instead of copying them.
+    Only the location fields, units and headers are read from the response,
+    the other methods apply to the points of the view.
+    """""
+    # Attributes of the response read through the view, besides its _meta_fields.
+    _response_attributes = ['units', 'http_headers']
+
+    def __init__(self, series, ranges):
+        self._series = series
+        self._ranges = ranges
+
+    def __getattr__(self, name):
+        # Location attributes, ie. city_name and timezone, come from the response.
+        if not name.startswith('_') and (name in self._series._meta_fields or name in self._response_attributes):
+            return getattr(self._series, name)
+        raise AttributeError("'SeriesView' object has no attribute '{}'".format(name))
+
+    def __len__(self):
+        return sum(hi - lo for lo, hi in self._ranges)
+
+    def __iter__(self):
+        points = self._series.points
+        for lo, hi in self._ranges:
+            for i in range(lo, hi):
+                yield points[i]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        for lo, hi in self._ranges:
+            if 0 <= i < hi - lo:
+                return self._series.points[lo + i]
+            i -= hi - lo
+        raise IndexError('SeriesView index out of range')
+
+    @property
+    def points(self):
+        return list(self)
+
+    def get(self, api_vars=None):
+        return self.get_series(api_vars)
+
+    def get_series(self, api_vars=None):
+        """""
+        Same as get_series() of the response, limited to the view, in the
+        order of the view (ie. December before January for a normals view
+        wrapping across the end of the year).
+        """""
+        return self._series._get_series(self.points, api_vars, sort=False)
+
+    def iter_series(self, api_vars=None, batch_size=None, as_tuples=False):
+        """""
+        Same as iter_series() of the response, limited to the view, in the
+        order of the view.
+        """""
+        return self._series._iter_series(self, api_vars, batch_size, as_tuples, sort=False)
+
+    def series_columns(self, api_vars=None):
+        """""
+        Same as series_columns() of the response, for the view.
+        """""
+        return self._series._series_columns(self, api_vars)
+
+    def derive(self, name, **params):
+        """""
+        Same as derive() of the response, one value per point of the view.
+        """""
+        return self._response().derive(name, **params)
+
+    def resample(self, granularity, how=None):
+        """""
+        Same as resample() of the response, over the points of the view.
+        """""
+        return self._response().resample(granularity, how)
+
+    def rolling(self, window, api_vars=None, how=None):
+        """""
+        Same as rolling() of the response, over the points of the view.
+        """""
+        return self._response().rolling(window, api_vars, how)
+
+    def at(self, *args):
+        """""
+        Same as at() of the response, None for points outside the view.
+        """""
+        return self._response().at(*args)
+
+    def nearest(self, timestamp):
+        """""
+        Same as nearest() of the response, among the points of the view.
+        """""
+        return self._response().nearest(timestamp)
+
+    def interpolate(self, timestamp, api_vars):
+        """""
+        Same as interpolate() of the response, None outside the view.
+        """""
+        return self._response().interpolate(timestamp, api_vars)
+
+    def to_bytes(self):
+        """""
+        Serializes the points of the view, see to_bytes() of the response.
+        """""
+        return self._response().to_bytes()
+
+    def _response(self):
+        """""
+        A lean response object holding the points of the view (without
+        copying them), rebuilt when the response is updated, or converted.
+        """""
+        series = self._series
+        cached = self.__dict__.get('_copy')
+        if cached is None or cached[0] is not series.points or cached[1] != series.units:
+            response = series._from_points(series._response_meta(), [('points', self.points)], series._loader)
+            cached = self._copy = (series.points, series.units, response)
+        return cached[2]
+
+def _sorted_order(points, sort_key):
+    """""
+    Returns None when points are in sort_key order (as loaded), or the sorted indexes.
+    """""
+    previous = None
+    for i, point in enumerate(points):
+        key = sort_key(point)
+        if i and key < previous:
+            return sorted(range(len(points)), key=lambda j: sort_key(points[j]))
+        previous = key
+    return None
+
+def _iter_rows(points, order, api_vars, exclude_none, time_vars, extra, as_tuples):
+    for i in (range(len(points)) if order is None else order):
+        p = points[i]
+        if as_tuples:
+            yield tuple([getattr(p, var) for var in api_vars] + [getattr(p, var) for var in time_vars] +
+                        [value for name, value in extra])
+            continue
+        series_point = {}
+        for var in api_vars:
+            val = getattr(p, var)
+            if exclude_none and val is None:
+                continue
+            series_point[var] = val
+        for var in time_vars:
+            series_point[var] = getattr(p, var)
+        for name, value in extra:
+            series_point[name] = value
+        yield series_point
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _default_vars(points):
+    """""
+    The variables of every point, in alphabetical order. Lean points only
+    hold their non-None attributes, so a variable missing from the first
+    point may be set on the others.
+    """""
+    names = set(type(points[0])._field_names())
+    for p in points:
+        names.update(vars(p))
+    return sorted(names)
+
+def _tuple_vars(points, time_vars):
+    """""
+    The variables of tuple rows without api_vars: the fields of the point
+    class in alphabetical order, but the time variables, which follow them.
+    """""
+    if len(points) == 0:
+        return []
+    return sorted(name for name in type(points[0])._field_names() if name not in time_vars)
+
+def _normals_key(key):
+    key = tuple(key) + (None,) * (3 - len(key))
+    return tuple(0 if part is None else part for part in key)
+
+# Point class -> names of its attributes, see BasePoint._field_names(). Not
+# a class attribute, so that it is not listed by dir() on the points.
+_FIELD_NAMES = {}
+
+class BasePoint(UnicodeMixin):
+    """""
+    Base class for the points of an API response.
+    """""
+    # Fields only set when present in the data.
+    _optional_fields = ()
+
+    @classmethod
+    def _field_names(cls):
+        names = _FIELD_NAMES.get(cls)
+        if names is None:
+            names = _FIELD_NAMES[cls] = frozenset(vars(cls({}))) | frozenset(cls._optional_fields)
+        return names
+
+    def __getattr__(self, name):
+        # Only reached for attributes dropped by _compact().
+        if name in type(self)._field_names():
+            return None
+        raise AttributeError(name)
+
+    def _compact(self):
+        """""
+        Drops the attributes that are None, they still read as None.
+        """""
+        self.__dict__ = dict((key, value) for key, value in vars(self).items() if value is not None)
+
+class Point(BasePoint):
     def __init__(self, point):
         self.revision_status = point.get('revision_status')
 
@@ -416,7 +1038,9 @@ class Point(UnicodeMixin):
 
         return datetime.datetime.strptime(datestamp, date_format)
 
-class SingleTimePoint(UnicodeMixin):
+class SingleTimePoint(BasePoint):
+    _optional_fields = ('sunrise', 'sunset')
+
     def __init__(self, point):
         self.city_name = point.get('city_name')
         self.lat = point.get('lat')
@@ -501,6 +1125,8 @@ class SingleTimePoint(UnicodeMixin):
 
         return datetime.datetime.strptime(datestamp, date_format)
 
+POINT_CLASSES = {'Point': Point, 'SingleTimePoint': SingleTimePoint}
+
 class Forecast(TimeSeries):
     """""
     The Forecast API Response class, extends TimeSeries.
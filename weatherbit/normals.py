@@ -0,0 +1,98 @@
+"""
+In-memory store of climate normals.
+
+Normals are static climatology, so the store fetches the full year once per
+location, time period and units, and answers any start_day / end_day window
+from memory, including windows wrapping across the end of the year. Like
+the API, windows include both start_day and end_day.
+"""
+import threading
+
+from weatherbit.utils import is_valid_day_format
+
+# Arguments identifying a full year table.
+TABLE_KEYS = ['lat', 'lon', 'tp', 'units', 'series_year']
+
+# Decimal places of the coordinates identifying a table.
+COORDINATE_PRECISION = 4
+
+
+def _table_key(kwargs):
+    key = []
+    for name in TABLE_KEYS:
+        value = kwargs.get(name)
+        if name in ['lat', 'lon'] and value is not None:
+            # '35.5' and 35.5 are the same table.
+            value = round(float(value), COORDINATE_PRECISION)
+        key.append(value)
+    return tuple(key)
+
+
+class NormalsStore(object):
+    def __init__(self, api):
+        self.api = api
+        self._tables = {}
+        # Key -> lock held while its table is fetched, so that fetching one
+        # table does not block the others.
+        self._fetching = {}
+        self._lock = threading.Lock()
+
+    def get_normals(self, **kwargs):
+        """
+        Same arguments as Api.get_normals(). Returns a lean Normals object
+        for the start_day to end_day window, both included, its points in
+        window order (ie. December before January).
+        """
+        if 'start_day' not in kwargs or 'end_day' not in kwargs:
+            raise Exception('start_day, and end_day required.')
+        if not is_valid_day_format(kwargs['start_day']) or not is_valid_day_format(kwargs['end_day']):
+            raise Exception('Invalid start_day, and end_day supplied. Expected format MM-DD')
+
+        table = self.get_table(**kwargs)
+        start = tuple(int(part) for part in kwargs['start_day'].split('-'))
+        end = tuple(int(part) for part in kwargs['end_day'].split('-'))
+        if self._granularity(kwargs) == 'monthly':
+            # Monthly points have no day, a window covers the months it touches.
+            start, end = start[:1], end[:1]
+        # The window ends before the day (or month) after end_day.
+        after_end = end[:-1] + (end[-1] + 1,)
+        if start <= end:
+            points = table.slice(start, after_end).points
+        else:
+            points = table.slice(start).points + table.slice(None, after_end).points
+
+        return table._from_points(table._response_meta(), [('points', points)], table._loader)
+
+    def get_table(self, **kwargs):
+        """
+        Returns the full year Normals for the location, fetching it on first use.
+        """
+        kwargs = dict(kwargs)
+        kwargs['tp'] = self._granularity(kwargs)
+        key = _table_key(kwargs)
+
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                return table
+            fetching = self._fetching.setdefault(key, threading.Lock())
+
+        with fetching:
+            # Fetched by another thread while we waited.
+            with self._lock:
+                table = self._tables.get(key)
+            if table is None:
+                kwargs['start_day'] = '01-01'
+                kwargs['end_day'] = '12-31'
+                table = self.api.get_normals(**kwargs)
+                with self._lock:
+                    self._tables[key] = table
+                    self._fetching.pop(key, None)
+        return table
+
+    def clear(self):
+        with self._lock:
+            self._tables = {}
+
+    def _granularity(self, kwargs):
+        return kwargs.get('tp', self.api.history_granularity)
@@ -0,0 +1,156 @@
+"""
+Record, and replay API traffic.
+
+RecordingTransport wraps a transport, and appends every request and response
+to an archive: the URL normalized (API key removed, query arguments sorted),
+the status, headers, the recorded latency, and the zlib compressed payload.
+ReplayTransport serves an archive without network access, or API quota, with
+the recorded (or configured) latencies, and an optional throughput limit.
+Payloads are replayed byte for byte, so parsing costs stay realistic.
+
+Archive records are: a '<II' header (metadata, and payload lengths), the
+JSON metadata, and the compressed payload.
+"""
+import json
+import time
+import zlib
+import random
+import struct
+import threading
+
+try:
+    from urllib.parse import urlsplit, parse_qsl, urlencode
+except ImportError:
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+
+from weatherbit.transport import Transport, RequestsTransport, Response, DeadlineExceeded, sleep_within
+from weatherbit.utils import RateLimiter
+
+RECORD_HEADER = struct.Struct('<II')
+
+
+def normalize_url(url):
+    """
+    Returns the path, and sorted query arguments of url, without the API key.
+    """
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query) if name != 'key')
+    return parts.path + '?' + urlencode(query)
+
+
+class RecordingTransport(Transport):
+    def __init__(self, path, transport=None):
+        """
+        Appends the traffic of transport (default: RequestsTransport) to the archive at path.
+        """
+        self.transport = transport or RequestsTransport()
+        self.retry_exceptions = self.transport.retry_exceptions
+        self.path = path
+        self.records = 0
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        started = time.time()
+        response = self.transport.get(url, timeout=timeout)
+        meta = json.dumps({
+            'url': normalize_url(url),
+            'status_code': response.status_code,
+            'headers': dict(response.headers or {}),
+            'latency': time.time() - started,
+        }).encode('utf-8')
+        content = zlib.compress(response.content)
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(len(meta), len(content)))
+            self._file.write(meta)
+            self._file.write(content)
+            self._file.flush()
+            self.records += 1
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self.transport.close()
+
+
+def read_archive(path):
+    """
+    Yields the (metadata, payload) records of an archive.
+    """
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            meta_size, content_size = RECORD_HEADER.unpack(header)
+            meta = f.read(meta_size)
+            content = f.read(content_size)
+            if len(content) < content_size:
+                # Partial record of an interrupted recording.
+                return
+            yield json.loads(meta.decode('utf-8')), zlib.decompress(content)
+
+
+class ReplayTransport(Transport):
+    retry_exceptions = (DeadlineExceeded,)
+
+    def __init__(self, path, latency='recorded', throughput=None, strict=False, seed=None):
+        """
+        Serves the archive at path. 'latency' is 'recorded' (the latency of
+        each recorded response), None, a number of seconds, a list of
+        latencies sampled at random, or a function returning one. 'throughput'
+        limits the requests per second. URLs recorded several times are
+        served in turn. Unknown URLs are answered with a 404, or raise when
+        strict. Latencies over the timeout raise DeadlineExceeded. 'seed'
+        seeds the sampling of latencies, for reproducible replays.
+        """
+        self.latency = latency
+        self._random = random.Random(seed)
+        self.strict = strict
+        self.requests = 0
+        self._limiter = RateLimiter(throughput)
+        self._responses = {}
+        self._turns = {}
+        self._lock = threading.Lock()
+        for meta, content in read_archive(path):
+            self._responses.setdefault(meta['url'], []).append(
+                (meta['status_code'], meta['headers'], meta.get('latency', 0.0), content))
+
+    def urls(self):
+        """
+        Returns the normalized URLs in the archive.
+        """
+        return list(self._responses)
+
+    def _delay(self, recorded):
+        if self.latency == 'recorded':
+            return recorded
+        if not self.latency:
+            return 0.0
+        if callable(self.latency):
+            return self.latency()
+        if isinstance(self.latency, (list, tuple)):
+            return self._random.choice(self.latency)
+        return self.latency
+
+    def get(self, url, timeout=None):
+        self._limiter.wait()
+        key = normalize_url(url)
+        with self._lock:
+            self.requests += 1
+            responses = self._responses.get(key)
+            if responses:
+                turn = self._turns.get(key, 0)
+                self._turns[key] = turn + 1
+        if not responses:
+            if self.strict:
+                raise Exception('No recorded response for {}'.format(key))
+            return Response(url, 404, b'{"error": "Not recorded."}', {'Content-Type': 'application/json'})
+
+        status_code, headers, recorded, content = responses[turn % len(responses)]
+        delay = self._delay(recorded)
+        if delay > 0:
+            sleep_within(delay, timeout)
+        return Response(url, status_code, content, headers)
@@ -0,0 +1,312 @@
+"""
+Compact binary layout for parsed API responses.
+
+A serialized response is laid out as:
+
+    magic (4 bytes) | version (1 byte) | metadata | string table | point lists
+
+Each point list is stored column by column. A column holds a field name, a
+type code, a presence bitmap (one bit per point, set when the value is not
+None) and the present values packed as a typed array. Columns mixing ints
+and floats are stored as floats, with a second bitmap flagging the ints.
+Strings, and values that are neither numbers nor datetimes (ie. the 'weather'
+dicts), are interned in the string table and stored as indexes, so repeated
+values cost 4 bytes.
+
+All integers are little-endian.
+"""
+import sys
+import json
+import array
+import struct
+import datetime
+
+from weatherbit.utils import to_micros, from_micros
+
+MAGIC = b'WBIT'
+VERSION = 1
+
+# Column type codes.
+TYPE_INT = b'q'
+TYPE_FLOAT = b'd'
+TYPE_NUMBER = b'n'
+TYPE_DATETIME = b't'
+TYPE_STRING = b's'
+TYPE_OBJECT = b'o'
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_ARRAY_TYPECODES = {TYPE_INT: 'q', TYPE_FLOAT: 'd', TYPE_NUMBER: 'd', TYPE_DATETIME: 'q', TYPE_STRING: 'I', TYPE_OBJECT: 'I'}
+_UINT32 = struct.Struct('<I')
+_OBJECT_ENCODER = json.JSONEncoder(sort_keys=True)
+
+
+def _column_type(values):
+    """
+    Returns the narrowest type code holding every (non-None) value.
+    """
+    types = set(map(type, values))
+    if types == set([int]) and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        return TYPE_INT
+    if types == set([float]):
+        return TYPE_FLOAT
+    if types == set([int, float]):
+        # Mixed ints and floats (ie. 0 and 0.5), ints are flagged in a second bitmap.
+        ints = [value for value in values if type(value) is int]
+        if -(1 << 53) <= min(ints) and max(ints) <= 1 << 53:
+            return TYPE_NUMBER
+    if types == set([datetime.datetime]) and all(value.tzinfo is None for value in values):
+        return TYPE_DATETIME
+    if types == set([str]):
+        return TYPE_STRING
+    return TYPE_OBJECT
+
+
+def _pack_array(typecode, values):
+    packed = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_array(typecode, data):
+    unpacked = array.array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == 'big':
+        unpacked.byteswap()
+    return unpacked
+
+
+class _Writer(object):
+    def __init__(self):
+        self.chunks = []
+        self.strings = []
+        self.string_index = {}
+
+    def intern(self, value):
+        index = self.string_index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self.string_index[value] = index
+        return index
+
+    def write_uint(self, value):
+        self.chunks.append(_UINT32.pack(value))
+
+    def write_bytes(self, value):
+        self.write_uint(len(value))
+        self.chunks.append(value)
+
+    def write_str(self, value):
+        self.write_bytes(value.encode('utf-8'))
+
+
+class _Reader(object):
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def read(self, size):
+        chunk = self.data[self.offset:self.offset + size]
+        if len(chunk) != size:
+            raise Exception('Truncated weatherbit binary data.')
+        self.offset += size
+        return chunk
+
+    def read_uint(self):
+        return _UINT32.unpack(self.read(4))[0]
+
+    def read_bytes(self):
+        return self.read(self.read_uint())
+
+    def read_str(self):
+        return bytes(self.read_bytes()).decode('utf-8')
+
+
+def _bitmap(flags, count):
+    bitmap = bytearray((count + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bitmap
+
+
+def _columns(points):
+    """
+    Returns the (field, values) columns of points, None for missing values.
+    Points are grouped by the fields of their state, in order (all the same
+    for points of one class, except lean ones), and each group is transposed
+    at once.
+    """
+    count = len(points)
+    groups = {}
+    for i, point in enumerate(points):
+        state = vars(point)
+        groups.setdefault(tuple(state), []).append((i, state))
+
+    if len(groups) == 1:
+        (fields, group), = groups.items()
+        return list(zip(fields, zip(*[state.values() for _, state in group])))
+
+    columns = {}
+    for fields, group in groups.items():
+        indexes = [i for i, _ in group]
+        for field, values in zip(fields, zip(*[state.values() for _, state in group])):
+            column = columns.get(field)
+            if column is None:
+                column = columns[field] = [None] * count
+            for i, value in zip(indexes, values):
+                column[i] = value
+    return list(columns.items())
+
+
+def _encode_objects(writer, values, field):
+    """
+    Interns the JSON of non-string values, encoding each distinct value once.
+    """
+    encoded = {}
+    indexes = []
+    for value in values:
+        # Equal values are often the same object (ie. in points built from_bytes()).
+        key = id(value)
+        if key not in encoded:
+            try:
+                encoded[key] = writer.intern(_OBJECT_ENCODER.encode(value))
+            except TypeError:
+                raise Exception("Field '{}' can not be serialized.".format(field))
+        indexes.append(encoded[key])
+    return indexes
+
+
+def _write_points(writer, points):
+    count = len(points)
+    columns = []
+    full_bitmap = _bitmap([True] * count, count)
+    for field, column in _columns(points):
+        missing = column.count(None)
+        if missing == count:
+            continue
+        if missing:
+            values = [value for value in column if value is not None]
+            bitmap = _bitmap([value is not None for value in column], count)
+        else:
+            values = list(column)
+            bitmap = bytearray(full_bitmap)
+        columns.append((field, bitmap, values))
+
+    writer.write_uint(count)
+    writer.write_uint(len(columns))
+    for field, bitmap, values in columns:
+        type_code = _column_type(values)
+        if type_code == TYPE_DATETIME:
+            values = [to_micros(value) for value in values]
+        elif type_code == TYPE_STRING:
+            index = dict((value, writer.intern(value)) for value in set(values))
+            values = [index[value] for value in values]
+        elif type_code == TYPE_NUMBER:
+            bitmap = bitmap + _bitmap([type(value) is int for value in values], len(values))
+        elif type_code == TYPE_OBJECT:
+            values = _encode_objects(writer, values, field)
+
+        writer.write_uint(writer.intern(field))
+        writer.chunks.append(type_code)
+        writer.chunks.append(bytes(bitmap))
+        writer.write_bytes(_pack_array(_ARRAY_TYPECODES[type_code], values))
+
+
+def _read_points(reader, strings, point_class):
+    count = reader.read_uint()
+    states = [{} for _ in range(count)]
+    decoded = {}
+
+    for _ in range(reader.read_uint()):
+        field = strings[reader.read_uint()]
+        type_code = bytes(reader.read(1))
+        bitmap = reader.read((count + 7) // 8)
+        if type_code == TYPE_NUMBER:
+            present = sum(bin(byte).count('1') for byte in bytes(bitmap))
+            int_bitmap = reader.read((present + 7) // 8)
+        values = _unpack_array(_ARRAY_TYPECODES[type_code], reader.read_bytes())
+
+        if type_code == TYPE_DATETIME:
+            values = [from_micros(value) for value in values]
+        elif type_code == TYPE_STRING:
+            values = [strings[index] for index in values]
+        elif type_code == TYPE_NUMBER:
+            values = [int(value) if int_bitmap[i >> 3] & (1 << (i & 7)) else value for i, value in enumerate(values)]
+        elif type_code == TYPE_OBJECT:
+            # Equal values decode to one shared object.
+            for index in set(values):
+                if index not in decoded:
+                    decoded[index] = json.loads(strings[index])
+            values = [decoded[index] for index in values]
+        else:
+            values = values.tolist()
+
+        values = iter(values)
+        for i in range(count):
+            if bitmap[i >> 3] & (1 << (i & 7)):
+                states[i][field] = next(values)
+
+    points = []
+    for state in states:
+        point = point_class.__new__(point_class)
+        point.__dict__ = state
+        points.append(point)
+    return points
+
+
+def dumps(meta, point_lists):
+    """
+    Serializes a response. 'meta' is a JSON serializable dict, and
+    'point_lists' a list of (name, points) pairs, where points may be None.
+    """
+    writer = _Writer()
+    writer.write_uint(len(point_lists))
+    for name, points in point_lists:
+        writer.write_str(name)
+        if points is None:
+            writer.chunks.append(b'\x00')
+            continue
+        writer.chunks.append(b'\x01')
+        writer.write_str(type(points[0]).__name__ if points else '')
+        _write_points(writer, points)
+
+    header = _Writer()
+    header.chunks.append(MAGIC + struct.pack('<B', VERSION))
+    header.write_str(json.dumps(meta, sort_keys=True))
+    header.write_uint(len(writer.strings))
+    for value in writer.strings:
+        header.write_str(value)
+
+    return b''.join(header.chunks + writer.chunks)
+
+
+def loads(data, point_classes):
+    """
+    Reverses dumps(). 'point_classes' maps the stored point class names to
+    classes. Returns the metadata dict, and a list of (name, points) pairs.
+    """
+    reader = _Reader(data)
+    if bytes(reader.read(4)) != MAGIC:
+        raise Exception('Not weatherbit binary data.')
+    version = struct.unpack('<B', reader.read(1))[0]
+    if version != VERSION:
+        raise Exception('Unsupported weatherbit binary data version {}.'.format(version))
+
+    meta = json.loads(reader.read_str())
+    strings = [reader.read_str() for _ in range(reader.read_uint())]
+
+    point_lists = []
+    for _ in range(reader.read_uint()):
+        name = reader.read_str()
+        if bytes(reader.read(1)) == b'\x00':
+            point_lists.append((name, None))
+            continue
+        class_name = reader.read_str()
+        if class_name and class_name not in point_classes:
+            raise Exception("Unknown point class '{}'.".format(class_name))
+        point_lists.append((name, _read_points(reader, strings, point_classes.get(class_name))))
+
+    return meta, point_lists
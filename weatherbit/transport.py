@@ -0,0 +1,313 @@
+"""
+HTTP transports used by Api to make requests.
+
+    - RequestsTransport: a requests Session, keeping a pool of HTTP/1.1
+      connections alive between calls (the default).
+    - HTTP2Transport: an httpx client multiplexing concurrent calls over
+      HTTP/2 connections (requires httpx[http2]).
+    - FakeTransport: serves canned, or generated Weatherbit payloads from
+      memory, without network access (ie. for tests, and load tests).
+
+A transport has a get(url, timeout=None) method returning a response with
+url, status_code, content, and headers attributes, and a retry_exceptions
+tuple of the exceptions worth retrying. timeout is the time left for the
+whole request, body included: transports raise DeadlineExceeded past it.
+"""
+import json
+import time
+import random
+import datetime
+import threading
+
+try:
+    from urllib.parse import urlsplit, parse_qsl, urlencode
+except ImportError:
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when a request is not answered within its deadline, whether or
+    not it is hedged.
+    """
+    pass
+
+
+class Response(object):
+    def __init__(self, url, status_code, content, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers if headers is not None else {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Transport(object):
+    """
+    Base class for the transports.
+    """
+    retry_exceptions = ()
+
+    def get(self, url, timeout=None):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    retry_exceptions = (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+
+    def __init__(self, pool_size=32):
+        """
+        Keeps up to pool_size connections alive per host.
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, timeout=None):
+        """
+        The body is streamed, and the deadline checked between chunks, so a
+        slowly trickling body can not overrun it. A single stalled read is
+        still bounded by the socket timeout, the time left when the request
+        started.
+        """
+        if timeout is None:
+            r = self.session.get(url)
+            return Response(r.url, r.status_code, r.content, r.headers)
+
+        deadline = time.time() + timeout
+        r = self.session.get(url, timeout=timeout, stream=True)
+        chunks = []
+        try:
+            for chunk in r.iter_content(65536):
+                chunks.append(chunk)
+                if time.time() > deadline:
+                    raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+        finally:
+            r.close()
+        return Response(r.url, r.status_code, b''.join(chunks), r.headers)
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(Transport):
+    def __init__(self, max_connections=4):
+        """
+        Concurrent calls share up to max_connections HTTP/2 connections.
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise Exception('HTTP2Transport requires httpx. Install it with: pip install httpx[http2]')
+        self.retry_exceptions = (httpx.TransportError, DeadlineExceeded)
+        self._timeout_exceptions = (httpx.TimeoutException,)
+        self.client = httpx.Client(http2=True, limits=httpx.Limits(max_connections=max_connections))
+
+    def get(self, url, timeout=None):
+        """
+        Like RequestsTransport, the body is streamed, and the deadline checked
+        between chunks, as httpx timeouts only bound each read. httpx
+        timeouts raise DeadlineExceeded.
+        """
+        if timeout is None:
+            r = self.client.get(url, timeout=None)
+            return Response(str(r.url), r.status_code, r.content, r.headers)
+
+        deadline = time.time() + timeout
+        chunks = []
+        try:
+            with self.client.stream('GET', url, timeout=timeout) as r:
+                for chunk in r.iter_bytes():
+                    chunks.append(chunk)
+                    if time.time() > deadline:
+                        raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+        except self._timeout_exceptions as e:
+            raise DeadlineExceeded('Request deadline of {}s exceeded: {}'.format(timeout, e))
+        return Response(str(r.url), r.status_code, b''.join(chunks), r.headers)
+
+    def close(self):
+        self.client.close()
+
+
+def _endpoint(url):
+    """
+    Returns the endpoint (ie. 'forecast/daily'), and query arguments of an API URL.
+    """
+    parts = urlsplit(url)
+    path = parts.path.strip('/').split('/')
+    if path and path[0].startswith('v'):
+        path = path[1:]
+    return '/'.join(path), dict(parse_qsl(parts.query))
+
+
+# Endpoint -> (time step, default number of points) of generated time series.
+SERIES_STEPS = {
+    'forecast/minutely': (datetime.timedelta(minutes=1), 60),
+    'forecast/hourly': (datetime.timedelta(hours=1), 48),
+    'forecast/daily': (datetime.timedelta(days=1), 16),
+    'forecast/airquality': (datetime.timedelta(hours=1), 72),
+    'forecast/agweather': (datetime.timedelta(days=1), 8),
+    'history/subhourly': (datetime.timedelta(minutes=15), None),
+    'history/hourly': (datetime.timedelta(hours=1), None),
+    'history/daily': (datetime.timedelta(days=1), None),
+    'history/airquality': (datetime.timedelta(hours=1), None),
+    'history/agweather': (datetime.timedelta(days=1), None),
+}
+
+
+def _parse_date(value):
+    if ':' in value:
+        return datetime.datetime.strptime(value, '%Y-%m-%d:%H')
+    return datetime.datetime.strptime(value, '%Y-%m-%d')
+
+
+def _weather_values(rng, endpoint):
+    if endpoint.endswith('airquality'):
+        return {'aqi': rng.randint(10, 150), 'pm25': round(rng.uniform(1, 60), 1),
+                'pm10': round(rng.uniform(2, 90), 1), 'o3': round(rng.uniform(10, 120), 1)}
+    temp = round(rng.uniform(-5, 32), 1)
+    return {'temp': temp, 'app_temp': temp, 'rh': rng.randint(20, 100), 'dewpt': round(temp - rng.uniform(0, 10), 1),
+            'wind_spd': round(rng.uniform(0, 12), 1), 'wind_dir': rng.randint(0, 359),
+            'precip': rng.choice([0, 0, 0, 0.5, 1.2]), 'snow': 0, 'pres': 1012.3, 'slp': 1015.1,
+            'clouds': rng.randint(0, 100), 'vis': 10, 'uv': round(rng.uniform(0, 9), 1),
+            'weather': {'icon': 'c02d', 'code': 802, 'description': 'Scattered clouds'}}
+
+
+def generate_payload(endpoint, query):
+    """
+    Generates a plausible payload for an endpoint, and query arguments. The
+    values are random, but the same for the same query.
+    """
+    rng = random.Random(json.dumps([endpoint, sorted(query.items())]))
+    lat = float(query.get('lat', 35.7796))
+    lon = float(query.get('lon', -78.6382))
+    location = {'city_name': query.get('city', 'Raleigh'), 'lat': lat, 'lon': lon, 'country_code': 'US',
+                'state_code': 'NC', 'timezone': 'America/New_York'}
+    offset = datetime.timedelta(hours=-5)
+
+    if endpoint in SERIES_STEPS:
+        step, count = SERIES_STEPS[endpoint]
+        if count is None:
+            start = _parse_date(query.get('start_date', '2020-01-01'))
+            end = _parse_date(query.get('end_date', '2020-01-02'))
+            count = max(0, int((end - start).total_seconds() // step.total_seconds()))
+        else:
+            start = datetime.datetime(2020, 1, 1)
+            count = int(query.get('days') or query.get('hours') or count)
+        daily = step >= datetime.timedelta(days=1)
+        data = []
+        for i in range(count):
+            t = start + i * step
+            point = _weather_values(rng, endpoint)
+            point['timestamp_utc'] = t.strftime('%Y-%m-%dT%H:%M:%S')
+            point['timestamp_local'] = (t + offset).strftime('%Y-%m-%dT%H:%M:%S')
+            point['datetime'] = t.strftime('%Y-%m-%d' if daily else '%Y-%m-%d:%H')
+            if daily and 'temp' in point:
+                point['max_temp'] = round(point['temp'] + rng.uniform(0, 8), 1)
+                point['min_temp'] = round(point['temp'] - rng.uniform(0, 8), 1)
+            data.append(point)
+        return dict(location, data=data)
+
+    if endpoint in ['current', 'current/airquality']:
+        point = dict(location, **_weather_values(rng, endpoint))
+        point['datetime'] = '2020-01-01:12'
+        point['ob_time'] = '2020-01-01 12:00'
+        point['timestamp_utc'] = '2020-01-01T12:00:00'
+        point['timestamp_local'] = '2020-01-01T07:00:00'
+        return {'count': 1, 'data': [point]}
+
+    if endpoint == 'alerts':
+        return dict(location, alerts=[])
+
+    if endpoint == 'normals':
+        data = []
+        for month in range(1, 13):
+            for day in range(1, 29):
+                point = _weather_values(rng, endpoint)
+                point.update({'month': month, 'day': day, 'max_temp': point['temp'] + 5, 'min_temp': point['temp'] - 5})
+                data.append(point)
+        return dict(location, data=data)
+
+    return None
+
+
+def sleep_within(delay, timeout):
+    """
+    Sleeps delay seconds, or timeout seconds then raises DeadlineExceeded.
+    Simulates the latency of a response.
+    """
+    if timeout is not None and delay > timeout:
+        time.sleep(max(0.0, timeout))
+        raise DeadlineExceeded('Request deadline of {}s exceeded.'.format(timeout))
+    time.sleep(delay)
+
+
+def _encode(payload):
+    if payload is None or isinstance(payload, bytes):
+        return payload
+    return json.dumps(payload).encode('utf-8')
+
+
+class FakeTransport(Transport):
+    retry_exceptions = (DeadlineExceeded,)
+
+    def __init__(self, payloads=None, generate=True, latency=0.0):
+        """
+        'payloads' maps endpoints (ie. 'forecast/daily') to a payload (dict,
+        or JSON bytes), or a function of (endpoint, query) returning one.
+        Other endpoints are generated (see generate_payload) when generate
+        is True, or answered with a 404. Encoded payloads are kept in memory,
+        and served after 'latency' seconds, or DeadlineExceeded is raised
+        when the timeout is shorter.
+        """
+        self.payloads = dict(payloads or {})
+        self.generate = generate
+        self.latency = latency
+        self.requests = 0
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def set_payload(self, endpoint, payload):
+        self.payloads[endpoint] = payload
+        self._encoded.pop(endpoint, None)
+
+    def _content(self, url):
+        endpoint, query = _endpoint(url)
+        query.pop('key', None)
+        payload = self.payloads.get(endpoint)
+        if callable(payload):
+            return _encode(payload(endpoint, query))
+        if payload is not None:
+            cache_key = endpoint
+        elif self.generate:
+            cache_key = endpoint + '?' + urlencode(sorted(query.items()))
+        else:
+            return None
+        content = self._encoded.get(cache_key)
+        if content is None:
+            if payload is None:
+                payload = generate_payload(endpoint, query)
+            content = _encode(payload)
+            if content is not None:
+                self._encoded[cache_key] = content
+        return content
+
+    def get(self, url, timeout=None):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            sleep_within(self.latency, timeout)
+        content = self._content(url)
+        if content is None:
+            return Response(url, 404, b'{"error": "Not found."}', {'Content-Type': 'application/json'})
+        return Response(url, 200, content, {'Content-Type': 'application/json'})
@@ -0,0 +1,73 @@
+"""
+Client-side conversion between the API unit systems: 'M' (metric), 'I'
+(imperial) and 'S' (scientific).
+
+Variables are grouped by the kind of unit they carry. Conversions go through
+metric, and are applied column by column over the points of a response.
+Converted values are not rounded.
+"""
+UNIT_SYSTEMS = ['M', 'I', 'S']
+
+TEMPERATURE_VARS = ['temp', 'app_temp', 'app_max_temp', 'app_min_temp', 'max_temp', 'high_temp', 'min_temp',
+                    'low_temp', 'dewpt', 'skin_temp_max', 'skin_temp_avg', 'skin_temp_min', 'temp_2m_avg',
+                    'soilt_0_10cm', 'soilt_10_40cm', 'soilt_40_100cm', 'soilt_100_200cm']
+SPEED_VARS = ['wind_spd', 'wind_gust_spd', 'max_wind_spd', 'min_wind_spd', 'wind_10m_spd_avg']
+DEPTH_VARS = ['precip', 'snow', 'snow_depth', 'precip_rate', 'evapotranspiration']
+DISTANCE_VARS = ['vis', 'visibility']
+
+# Kind -> unit system -> (from metric, to metric).
+CONVERSIONS = {
+    'temperature': {
+        'I': (lambda c: c * 9.0 / 5.0 + 32.0, lambda f: (f - 32.0) * 5.0 / 9.0),
+        'S': (lambda c: c + 273.15, lambda k: k - 273.15),
+    },
+    'speed': {
+        'I': (lambda ms: ms * 2.2369362920544, lambda mph: mph / 2.2369362920544),
+    },
+    'depth': {
+        'I': (lambda mm: mm / 25.4, lambda inches: inches * 25.4),
+    },
+    'distance': {
+        'I': (lambda km: km * 0.62137119223733, lambda mi: mi / 0.62137119223733),
+    },
+}
+
+VAR_KINDS = {}
+for _kind, _vars in [('temperature', TEMPERATURE_VARS), ('speed', SPEED_VARS), ('depth', DEPTH_VARS), ('distance', DISTANCE_VARS)]:
+    for _var in _vars:
+        VAR_KINDS[_var] = _kind
+
+
+def _identity(value):
+    return value
+
+
+def converter(kind, source, target):
+    """
+    Returns a function converting a value of kind from the source to the target unit system.
+    """
+    for units in [source, target]:
+        if units not in UNIT_SYSTEMS:
+            raise Exception("Unsupported units '{}'. Use one of: {}".format(units, ', '.join(UNIT_SYSTEMS)))
+    if source == target or (source not in CONVERSIONS[kind] and target not in CONVERSIONS[kind]):
+        return _identity
+    to_metric = CONVERSIONS[kind].get(source, (_identity, _identity))[1]
+    from_metric = CONVERSIONS[kind].get(target, (_identity, _identity))[0]
+    return lambda value: from_metric(to_metric(value))
+
+
+def convert_points(points, source, target):
+    """
+    Converts the points in place from the source to the target unit system.
+    """
+    if source == target or not points:
+        return
+    states = [vars(point) for point in points]
+    for var, kind in VAR_KINDS.items():
+        convert = converter(kind, source, target)
+        if convert is _identity:
+            continue
+        for state in states:
+            value = state.get(var)
+            if value is not None:
+                state[var] = convert(value)
@@ -1,5 +1,14 @@
 import sys
 import re
+import json
+import time
+import datetime
+import threading
+
+try:
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:
+    from urlparse import urlsplit, parse_qsl
 
 
 class UnicodeMixin(object):
@@ -20,3 +29,96 @@ class PropertyUnavailable(AttributeError):
 def is_valid_day_format(input_string):
     pattern = re.compile(r'^\d{2}-\d{2}$')
     return bool(pattern.match(input_string))
+
+def units_from_url(url):
+    """
+    The units of the data of an API URL: its 'units' argument, metric ('M') by default.
+    """
+    return dict(parse_qsl(urlsplit(url).query)).get('units', 'M')
+
+# Time variables of the points of time series.
+TIME_VARS = ['timestamp_utc', 'timestamp_local', 'datetime']
+
+EPOCH = datetime.datetime(1970, 1, 1)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+def to_micros(value):
+    """
+    Microseconds since the epoch of a naive (UTC) datetime.
+    """
+    return (value - EPOCH) // ONE_MICROSECOND
+
+def from_micros(value):
+    return EPOCH + datetime.timedelta(microseconds=value)
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def point_columns(points, api_vars=None):
+    """
+    Returns a dict of the variable columns of points (api_vars, or every
+    variable but the time variables), leaving out the columns without values.
+    """
+    if api_vars is None:
+        fields = {}
+        for point in points:
+            fields.update(dict.fromkeys(vars(point)))
+        api_vars = [field for field in fields if field not in TIME_VARS]
+    columns = {}
+    for var in api_vars:
+        column = [getattr(point, var) for point in points]
+        if any(value is not None for value in column):
+            columns[var] = column
+    return columns
+
+# JSON backends in order of preference when none is requested explicitly.
+JSON_BACKENDS = ['orjson', 'simdjson', 'ujson', 'json']
+
+def _load_json_backend(backend):
+    if backend == 'orjson':
+        import orjson
+        return orjson.loads
+    if backend == 'simdjson':
+        import simdjson
+        return simdjson.loads
+    if backend == 'ujson':
+        import ujson
+        return ujson.loads
+    if backend == 'json':
+        return json.loads
+    raise Exception("Unsupported JSON backend '{}'. Choose one of: {}".format(backend, ', '.join(JSON_BACKENDS)))
+
+def get_json_loads(backend=None):
+    """
+    Returns a function decoding JSON directly from response bytes.
+    If no backend is given, the fastest installed backend is used,
+    falling back to the standard library json module.
+    """
+    if backend is not None:
+        return _load_json_backend(backend)
+
+    for name in JSON_BACKENDS:
+        try:
+            return _load_json_backend(name)
+        except ImportError:
+            continue
+
+class RateLimiter(object):
+    def __init__(self, rate):
+        """
+        Spaces calls to wait() at most 'rate' per second across threads. A
+        rate of None or 0 does not limit.
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)